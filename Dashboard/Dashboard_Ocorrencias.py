@@ -1,5 +1,7 @@
 # Dashboard_Ocorrencias.py (Página Principal - Resumo Profissional com Head Count Global)
 
+import os
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -60,10 +62,24 @@ def format_decimal_to_hhmm(decimal_hours):
 
 
 # --- Carregamento de Dados e Cache ---
+ARQUIVO_OCORRENCIAS = 'Relatorio_OcorrenciasNoPonto.xlsx'
+ARQUIVO_BANCO_HORAS = 'Relatorio_ContaCorrenteBancoDeHorasResumo.xlsx'
+
+
+def assinatura_arquivo(caminho):
+    """(mtime, tamanho) do arquivo; None se não existir."""
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+# As assinaturas entram na chave do cache: o arquivo só é relido quando muda no disco
 @st.cache_data
-def load_data():
+def load_data(assinatura_ocorrencias=None, assinatura_banco_horas=None):
     try:
-        df_ocorrencias = pd.read_excel('Relatorio_OcorrenciasNoPonto.xlsx')
+        df_ocorrencias = pd.read_excel(ARQUIVO_OCORRENCIAS)
         df_ocorrencias['Data'] = pd.to_datetime(
             df_ocorrencias['Data'], errors='coerce', dayfirst=True)
         df_ocorrencias['is_impar'] = df_ocorrencias['Marcacoes'].apply(
@@ -80,7 +96,7 @@ def load_data():
 
     try:
         df_banco_horas = pd.read_excel(
-            'Relatorio_ContaCorrenteBancoDeHorasResumo.xlsx')
+            ARQUIVO_BANCO_HORAS)
 
         # Converte Saldo Final (mantém o sinal original)
         df_banco_horas['SaldoFinal_Horas'] = df_banco_horas['SaldoFinal'].apply(
@@ -106,7 +122,8 @@ def load_data():
     return df_ocorrencias, df_banco_horas
 
 
-df_ocorrencias, df_banco_horas = load_data()
+df_ocorrencias, df_banco_horas = load_data(
+    assinatura_arquivo(ARQUIVO_OCORRENCIAS), assinatura_arquivo(ARQUIVO_BANCO_HORAS))
 
 
 # --- CÁLCULOS DOS TOTAIS GLOBAIS ---
@@ -6,13 +6,19 @@ import streamlit as st
 
 import pandas as pd
 
-import plotly.express as px
-
 import numpy as np
 
-import requests             # Necessário para buscar URLs do GitHub
+from profarma import dados    # Camada de dados única, compartilhada com as demais páginas
+
+from profarma import cubo     # Estabelecimento × Departamento pré-agregado (KPIs e gráfico)
+
+from profarma import graficos  # Barras em graph_objects + cache das figuras (JSON)
 
-import io                   # NOVO: Necessário para lidar com dados binários do Excel (BytesIO)
+from profarma import memo     # Resultados por filtro (LRU compartilhado entre sessões)
+
+from profarma.indice import project, restrict
+
+from profarma.tabelas import paginated_dataframe  # Só a página visível vai para o navegador
 
 
 
@@ -28,161 +34,71 @@ COR_CONTRASTE = "#4CAF50" # Cor usada para contrastes (Marcações Ímpares)
 
 
 
-# --- URLs BRUTAS DO GITHUB (AJUSTE CRÍTICO PARA XLSX) ---
-
-REPO_URL_BASE = 'https://raw.githubusercontent.com/oliveirafabio8813-design/meu-dashboard-profarma/main/Dashboard/'
-
-
-
-# Arquivos XLSX e suas abas
-
-URL_OCORRENCIAS = REPO_URL_BASE + 'Relatorio_OcorrenciasNoPonto.xlsx'
-
-SHEET_OCORRENCIAS = 'OcorrênciasnoPonto' # Nome da aba no Excel
-
-
-
-URL_BANCO_HORAS_RESUMO = REPO_URL_BASE + 'Relatorio_ContaCorrenteBancoDeHorasResumo.xlsx' # Mantido para carregar Estabelecimento/Departamento
-
-SHEET_BANCO_HORAS = 'ContaCorrenteBancodeHorasResum'
-
-
-
 # --- Funções de Processamento de Dados ---
 
 
 
-@st.cache_data(show_spinner="Carregando dados do GitHub...")
-
-def load_data_from_github(url, sheet_name):
-
-    """Carrega o arquivo Excel (XLSX) do link Raw do GitHub."""
-
-    try:
-
-        response = requests.get(url, timeout=30)
-
-        response.raise_for_status() # Lança erro para códigos HTTP 4xx/5xx
-
-        # Lê o conteúdo binário da resposta e usa pd.read_excel
-
-        return pd.read_excel(io.BytesIO(response.content), sheet_name=sheet_name)
-
-    except Exception as e:
-
-        st.error(f"⚠️ Erro ao carregar dados do GitHub ({url}, Aba: {sheet_name}): {e}")
-
-        return pd.DataFrame()
-
-
-
-
-
-def e_marcacoes_impar(marcacoes):
-
-    if pd.isna(marcacoes):
-
-        return False
-
-    return len(str(marcacoes).strip().split()) % 2 != 0
-
-
-
-
-
-def convert_to_hours(time_str):
-
-    if pd.isna(time_str) or time_str == '00:00':
-
-        return 0.0
-
-    try:
-
-        is_negative = str(time_str).startswith('-')
-
-        if is_negative:
-
-            time_str = str(time_str)[1:]
-
-        parts = str(time_str).split(':')
-
-        hours = int(parts[0])
-
-        minutes = int(parts[1])
-
-        total_hours = hours + minutes / 60
-
-        return -total_hours if is_negative else total_hours
+def load_data():
 
-    except (ValueError, IndexError):
+    # Dataset compartilhado do processo (mesma carga da página inicial e do Banco de Horas)
 
-        return 0.0
+    with st.spinner("Carregando dados do GitHub..."):
 
+        dataset = dados.get_dataset()
 
 
 
+    for aviso in dataset.avisos:
 
-@st.cache_data
+        st.warning(aviso)
 
-def load_data():
+    for erro in dataset.erros:
 
-    # CHAMA A FUNÇÃO CORRIGIDA PARA XLSX
+        st.error(erro)
 
-    df_ocorrencias = load_data_from_github(URL_OCORRENCIAS, SHEET_OCORRENCIAS)
 
-    df_banco_horas = load_data_from_github(URL_BANCO_HORAS_RESUMO, SHEET_BANCO_HORAS)
 
-    
-
-    if df_ocorrencias.empty:
+    if dataset.ocorrencias.empty:
 
         st.error("Falha ao carregar o DataFrame de Ocorrências do GitHub.")
 
         st.stop()
 
-        
-
-    try:
-
-        # Processamento de Ocorrências (Mantido do original)
 
-        df_ocorrencias['Data'] = pd.to_datetime(
 
-            df_ocorrencias['Data'], errors='coerce', dayfirst=True)
+    return dataset
 
-        df_ocorrencias['is_impar'] = df_ocorrencias['Marcacoes'].apply(
 
-            e_marcacoes_impar)
 
-        df_ocorrencias['is_sem_marcacao'] = df_ocorrencias['Ocorrencia'].isin(
 
-            ['Sem marcação de entrada', 'Sem marcação de saída'])
 
-    except Exception as e:
+dataset = load_data()
 
-        st.error(f"Erro ao processar dados de Ocorrências: {e}")
+df_ocorrencias, df_cubo, indice_filtros = dataset.ocorrencias, dataset.cubo, dataset.indice_ocorrencias
 
-        st.stop()
 
 
 
-    if not df_banco_horas.empty:
 
-        # Processamento de Banco de Horas (Mantido o necessário para filtros)
+def grafico_departamentos(df, height):
 
-        df_banco_horas['SaldoFinal_Horas'] = df_banco_horas['SaldoFinal'].apply(
+    # Montado só quando df_chart/altura mudam (cache em profarma.graficos)
 
-            convert_to_hours)
+    return graficos.stacked_bars(
 
-    
+        df['Departamento'],
 
-    return df_ocorrencias, df_banco_horas
+        {'Total_Faltas': df['Total_Faltas'], 'Total_Impares': df['Total_Impares'],
 
+         'Total_Sem_Marcacao': df['Total_Sem_Marcacao']},
 
+        [COR_CONTRASTE, '#ffc107', '#17a2b8'],
 
+        height=height, titulo_x="Total de Ocorrências",
 
+        titulo_y='Departamento', titulo_legenda='Tipo'
 
-df_ocorrencias, df_banco_horas = load_data()
+    )
 
 
 
@@ -282,9 +198,9 @@ with col_filter_button:
 
 with col_filter_est:
 
-    todos_estabelecimentos = sorted(
+    # opções já ordenadas, montadas na carga
 
-        list(df_ocorrencias['Estabelecimento'].unique()))
+    todos_estabelecimentos = indice_filtros.options('Estabelecimento')
 
     selected_establishments = st.multiselect(
 
@@ -306,21 +222,9 @@ with col_filter_est:
 
 
 
-# 2. Filtragem Inicial por Estabelecimento
-
-if selected_establishments:
+# 2. Escopo do Estabelecimento: união dos conjuntos de Departamentos pré-calculados na carga
 
-    # Se a lista não estiver vazia
-
-    df_ocorrencias_filtrado = df_ocorrencias[df_ocorrencias['Estabelecimento'].isin(
-
-        selected_establishments)].copy()
-
-else:
-
-    # Se a lista estiver vazia, usa o DataFrame completo
-
-    df_ocorrencias_filtrado = df_ocorrencias.copy()
+departamentos_escopo = indice_filtros.department_set(selected_establishments)
 
 
 
@@ -330,9 +234,7 @@ with col_filter_dep:
 
     # Opções de departamento são baseadas no df filtrado pelo estabelecimento
 
-    todos_departamentos = sorted(
-
-        list(df_ocorrencias_filtrado['Departamento'].unique()))
+    todos_departamentos = sorted(departamentos_escopo)
 
 
 
@@ -344,7 +246,7 @@ with col_filter_dep:
 
     new_selection_dep = [
 
-        dep for dep in current_selection_dep if dep in todos_departamentos]
+        dep for dep in current_selection_dep if dep in departamentos_escopo]  # lookup em set
 
     if set(current_selection_dep) != set(new_selection_dep):
 
@@ -366,273 +268,236 @@ with col_filter_dep:
 
 
 
-# 4. Filtragem Final por Departamento
+# 4. Cálculos do filtro atual (KPIs, gráfico e tabelas), memoizados por seleção + versão
 
-if selected_departments:
+def calcular_filtro():
 
-    df_ocorrencias_filtrado = df_ocorrencias_filtrado[df_ocorrencias_filtrado['Departamento'].isin(
+    # AND dos bitmaps das duas dimensões; o frame só é lido na projeção das tabelas
 
-        selected_departments)].copy()
+    linhas_filtradas = indice_filtros.rows(
 
+        Estabelecimento=selected_establishments, Departamento=selected_departments)
 
 
 
+    # KPIs: fatia do cubo pré-agregado (sem varrer as linhas filtradas)
 
-# --- ANÁLISE GERAL DOS DADOS FILTRADOS ---
+    cubo_filtrado = cubo.slice_cube(df_cubo, selected_establishments, selected_departments)
 
-st.markdown('---')
+    totais_filtrado = cubo.totals(cubo_filtrado)
 
-st.subheader('Resumo das Ocorrências (Filtros Aplicados)')
 
 
+    # Agrupamento por Departamento (Faltas e Ímpares)
 
-# Cálculos de KPIs
+    df_chart = cubo.by_level(cubo_filtrado, 'Departamento',
 
-df_ocorrencias_filtrado['is_falta_nao_justificada'] = df_ocorrencias_filtrado.apply(
+                             ['Total_Faltas', 'Total_Impares', 'Total_Sem_Marcacao'])
 
-    lambda row: 1 if row['Ocorrencia'] == 'Falta' and row['Justificativa'] == 'Falta' else 0,
 
-    axis=1
 
-)
+    df_chart['Total_Ocorrencias'] = df_chart['Total_Faltas'] + \
+        df_chart['Total_Impares'] + df_chart['Total_Sem_Marcacao']
 
-total_faltas_filtrado = df_ocorrencias_filtrado['is_falta_nao_justificada'].sum()
 
-total_impares_filtrado = df_ocorrencias_filtrado['is_impar'].sum()
 
-total_sem_marcacao_filtrado = df_ocorrencias_filtrado['is_sem_marcacao'].sum()
+    # Remover departamentos sem ocorrências no filtro
 
-total_marcacoes_impares_filtrado = int(
+    df_chart = df_chart[df_chart['Total_Ocorrencias'] > 0].sort_values(
 
-    total_impares_filtrado + total_sem_marcacao_filtrado)
+        'Total_Ocorrencias', ascending=True
 
+    )
 
 
 
+    # Tabela de Faltas
 
-col_kpi_1, col_kpi_2, col_kpi_3, _ = st.columns(4)
+    linhas_faltas = restrict(
 
+        linhas_filtradas, df_ocorrencias['is_falta_nao_justificada'].to_numpy())
 
 
-with col_kpi_1:
 
-    st.metric(
+    faltas_df = project(df_ocorrencias, linhas_faltas, {
 
-        label="Total de Faltas Não Justificadas",
+        'Matricula': 'Matrícula', 'Nome': 'Nome do Funcionário',
 
-        value=f"{int(total_faltas_filtrado)}",
+        'Data': 'Data da Falta', 'Departamento': 'Departamento', 'Ocorrencia': 'Tipo'
 
-        delta_color="off"
+    })
 
-    )
+    # Já ordenada por (Nome, Data): as linhas vêm do frame pré-ordenado na carga
 
+    faltas_df['Data da Falta'] = faltas_df['Data da Falta'].dt.strftime(
 
+        '%d/%m/%Y')
 
-with col_kpi_2:
 
-    st.metric(
 
-        label="Total de Marcações Ímpares/Ausentes",
+    # Tabela de Marcações Ímpares/Ausentes
 
-        value=f"{total_marcacoes_impares_filtrado}",
+    linhas_impares = restrict(
 
-        delta_color="off"
+        linhas_filtradas,
 
-    )
+        df_ocorrencias['is_impar'].to_numpy() | df_ocorrencias['is_sem_marcacao'].to_numpy())
 
 
 
+    impares_df = project(df_ocorrencias, linhas_impares, {
 
+        'Matricula': 'Matrícula', 'Nome': 'Nome do Funcionário',
 
-# --- GRÁFICO DE BARRAS DE OCORRÊNCIAS POR DEPARTAMENTO ---
+        'Data': 'Data da Marcação Ímpar', 'Departamento': 'Departamento',
 
-st.markdown('---')
+        'Marcacoes': 'Marcações Registradas'
 
-st.subheader('Ocorrências por Departamento (Detalhe)')
+    })
 
 
 
+    # Mesma ordem (Nome, Data) herdada da carga; só formata a data para exibição
 
+    impares_df['Data da Marcação Ímpar'] = impares_df['Data da Marcação Ímpar'].dt.strftime(
 
-# 1. Agrupamento por Departamento (Faltas e Ímpares)
+        '%d/%m/%Y')
 
-df_chart = df_ocorrencias_filtrado.groupby('Departamento').agg(
 
-    Total_Faltas=('is_falta_nao_justificada', 'sum'),
 
-    Total_Impares=('is_impar', 'sum'),
+    return {
 
-    Total_Sem_Marcacao=('is_sem_marcacao', 'sum')
+        'total_faltas': int(totais_filtrado['Total_Faltas']),
 
-).reset_index()
+        'total_marcacoes_impares': int(
 
+            totais_filtrado['Total_Impares'] + totais_filtrado['Total_Sem_Marcacao']),
 
+        'df_chart': df_chart,
 
-df_chart['Total_Ocorrencias'] = df_chart['Total_Faltas'] + \
+        'faltas_df': faltas_df,
 
-    df_chart['Total_Impares'] + df_chart['Total_Sem_Marcacao']
+        'impares_df': impares_df,
 
+    }
 
 
-# 2. Remover departamentos sem ocorrências no filtro
 
-df_chart = df_chart[df_chart['Total_Ocorrencias'] > 0].sort_values(
 
-    'Total_Ocorrencias', ascending=True
 
-)
+# Mesma seleção (em qualquer ordem) e mesma versão dos dados -> resultado do memo, sem recalcular
 
+resultado = memo.resultados.get_or_compute(
 
+    memo.filter_key('ocorrencias', dataset.versao,
 
-if not df_chart.empty:
+                    selected_establishments, selected_departments),
 
-    # CÁLCULO DA ALTURA DINÂMICA
+    calcular_filtro)
 
-    num_departamentos = len(df_chart)
-
-    # 40px por barra + 80px de margem, limitado a 700px
-
-    chart_height = min(num_departamentos * 40 + 80, 700)
 
 
 
-    fig_departamento = px.bar(
 
-        df_chart,
+# --- ANÁLISE GERAL DOS DADOS FILTRADOS ---
 
-        y='Departamento',
+st.markdown('---')
 
-        x=['Total_Faltas', 'Total_Impares', 'Total_Sem_Marcacao'],
+st.subheader('Resumo das Ocorrências (Filtros Aplicados)')
 
-        orientation='h',
 
-        color_discrete_sequence=[
 
-            COR_CONTRASTE, '#ffc107', '#17a2b8'],
+total_faltas_filtrado = resultado['total_faltas']
 
-        labels={'value': 'Total de Ocorrências',
+total_marcacoes_impares_filtrado = resultado['total_marcacoes_impares']
 
-                'Departamento': 'Departamento',
 
-                'variable': 'Tipo de Ocorrência'},
 
-        template='plotly_white',
 
-        height=chart_height
 
-    )
+col_kpi_1, col_kpi_2, col_kpi_3, _ = st.columns(4)
 
 
 
-    # Adiciona a soma total como texto no final de cada barra
+with col_kpi_1:
 
-    fig_departamento.update_traces(
+    st.metric(
 
-        # text=df_chart['Total_Ocorrencias'], # Apenas se usar a soma total
+        label="Total de Faltas Não Justificadas",
 
-        textposition='outside',
+        value=f"{int(total_faltas_filtrado)}",
 
-        cliponaxis=False
+        delta_color="off"
 
     )
 
-    # Configurações de layout
-
-    fig_departamento.update_layout(
-
-        xaxis_title="Total de Ocorrências",
 
-        legend_title_text='Tipo',
 
-        uniformtext_minsize=8,
+with col_kpi_2:
 
-        uniformtext_mode='hide',
+    st.metric(
 
-    )
+        label="Total de Marcações Ímpares/Ausentes",
 
-    st.plotly_chart(fig_departamento, use_container_width=True)
+        value=f"{total_marcacoes_impares_filtrado}",
 
-else:
+        delta_color="off"
 
-    st.info("Nenhuma ocorrência encontrada para os filtros aplicados.")
+    )
 
 
 
 
 
-# --- DETALHE DE OCORRÊNCIAS (TABELA) ---
+# --- GRÁFICO DE BARRAS DE OCORRÊNCIAS POR DEPARTAMENTO ---
 
 st.markdown('---')
 
-st.subheader('Detalhamento por Colaborador')
-
-
-
-
-
-# 1. Tabela de Faltas
-
-faltas_df = df_ocorrencias_filtrado[
-
-    df_ocorrencias_filtrado['is_falta_nao_justificada'] == 1
-
-].copy()
-
-
-
-faltas_df = faltas_df[[
-
-    'Matricula', 'Nome', 'Data', 'Departamento', 'Ocorrencia'
-
-]]
+st.subheader('Ocorrências por Departamento (Detalhe)')
 
-faltas_df.columns = ['Matrícula', 'Nome do Funcionário',
 
-                     'Data da Falta', 'Departamento', 'Tipo']
 
-faltas_df['Data da Falta'] = faltas_df['Data da Falta'].dt.strftime(
+df_chart = resultado['df_chart']
 
-    '%d/%m/%Y')
 
-# Ordenação
 
-faltas_df = faltas_df.sort_values(
+if not df_chart.empty:
 
-    by=['Nome do Funcionário', 'Data da Falta']).reset_index(drop=True)
+    # CÁLCULO DA ALTURA DINÂMICA
 
+    num_departamentos = len(df_chart)
 
+    # 40px por barra + 80px de margem, limitado a 700px
 
+    chart_height = min(num_departamentos * 40 + 80, 700)
 
 
-# 2. Tabela de Marcações Ímpares/Ausentes
 
-impares_df = df_ocorrencias_filtrado[
+    fig_departamento = graficos.cached_figure(
 
-    df_ocorrencias_filtrado['is_impar'] | df_ocorrencias_filtrado['is_sem_marcacao']
+        'ocorrencias_departamento', df_chart, grafico_departamentos, height=chart_height)
 
-].copy()
+    st.plotly_chart(fig_departamento, use_container_width=True)
 
+else:
 
+    st.info("Nenhuma ocorrência encontrada para os filtros aplicados.")
 
-impares_df = impares_df[[
 
-    'Matricula', 'Nome', 'Data', 'Departamento', 'Marcacoes'
 
-]]
 
-impares_df.columns = ['Matrícula', 'Nome do Funcionário',
 
-                      'Data da Marcação Ímpar', 'Departamento', 'Marcações Registradas']
+# --- DETALHE DE OCORRÊNCIAS (TABELA) ---
 
+st.markdown('---')
 
+st.subheader('Detalhamento por Colaborador')
 
-impares_df = impares_df.sort_values(
 
-    by=['Nome do Funcionário', 'Data da Marcação Ímpar']).reset_index(drop=True)
 
-impares_df['Data da Marcação Ímpar'] = impares_df['Data da Marcação Ímpar'].dt.strftime(
+faltas_df = resultado['faltas_df']
 
-    '%d/%m/%Y')
+impares_df = resultado['impares_df']
 
 
 
@@ -648,25 +513,9 @@ with detalhe_col1:
 
     if not faltas_df.empty:
 
-        # CÁLCULO DA ALTURA DINÂMICA PARA FALTAS
-
-        num_rows = len(faltas_df)
-
-        dynamic_height = min(num_rows * 35 + 40, 500)
-
-
-
-        st.dataframe(
-
-            faltas_df,
-
-            use_container_width=True,
-
-            hide_index=True,
+        # Paginada: altura dinâmica calculada sobre a página exibida
 
-            height=dynamic_height
-
-        )
+        paginated_dataframe(faltas_df, key='pagina_faltas')
 
     else:
 
@@ -682,25 +531,9 @@ with detalhe_col2:
 
     if not impares_df.empty:
 
-        # CÁLCULO DA ALTURA DINÂMICA PARA MARCAÇÕES ÍMPARES
-
-        num_rows = len(impares_df)
-
-        dynamic_height = min(num_rows * 35 + 40, 500)
-
-
-
-        st.dataframe(
-
-            impares_df,
-
-            use_container_width=True,
-
-            hide_index=True,
-
-            height=dynamic_height
+        # Paginada: altura dinâmica calculada sobre a página exibida
 
-        )
+        paginated_dataframe(impares_df, key='pagina_impares')
 
     else:
 
@@ -2,137 +2,59 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import numpy as np
-import requests             # Necessário para buscar URLs do GitHub
-import io                   # NOVO: Necessário para lidar com dados binários do Excel (BytesIO)
+from profarma import dados    # Camada de dados única, compartilhada com as demais páginas
+from profarma import cubo     # Estabelecimento × Departamento pré-agregado (rankings)
+from profarma import graficos  # Barras em graph_objects + cache das figuras (JSON)
+from profarma import memo     # Resultados por filtro (LRU compartilhado entre sessões)
+from profarma.horas import min_series_to_hhmm
+from profarma.indice import ordered, project
+from profarma.tabelas import paginated_dataframe  # Só a página visível vai para o navegador
 
 # --- Constantes e Configurações ---
 st.set_page_config(
-    layout="wide", page_title="Dashboard Profarma - Banco de Horas")
-COR_PRINCIPAL_VERDE = "#70C247"  # Cor para Crédito/Pagamentos
-COR_CONTRASTE = "#dc3545"  # Cor para Débito/Descontos
+    layout="wide", page_title="Dashboard Profarma - Banco de Horas")
+COR_PRINCIPAL_VERDE = "#70C247"  # Cor para Crédito/Pagamentos
+COR_CONTRASTE = "#dc3545"  # Cor para Débito/Descontos
 
-# --- URLs BRUTAS DO GITHUB (AJUSTE CRÍTICO PARA XLSX) ---
-REPO_URL_BASE = 'https://raw.githubusercontent.com/oliveirafabio8813-design/meu-dashboard-profarma/main/Dashboard/'
+# --- Funções e Carregamento de Dados ---
 
-# Arquivos XLSX e suas abas
-URL_BANCO_HORAS_RESUMO = REPO_URL_BASE + 'Relatorio_ContaCorrenteBancoDeHorasResumo.xlsx'
-SHEET_BANCO_HORAS = 'ContaCorrenteBancodeHorasResum'
+def load_data():
+    # Dataset compartilhado do processo (mesma carga da página inicial e de Ocorrências).
+    # Horas já vêm em minutos inteiros (SaldoFinal_Min, Pagamentos_Min, Descontos_Min)
+    # e nas colunas de exibição 'Saldo Final (HH:MM)', 'Pagamentos (HH:MM)', 'Descontos (HH:MM)'.
+    with st.spinner("Carregando dados do GitHub..."):
+        dataset = dados.get_dataset()
 
-URL_OCORRENCIAS = REPO_URL_BASE + 'Relatorio_OcorrenciasNoPonto.xlsx' # Mantido para carregar na load_data, se necessário
-SHEET_OCORRENCIAS = 'OcorrênciasnoPonto'
+    for aviso in dataset.avisos:
+        st.warning(aviso)
+    for erro in dataset.erros:
+        st.error(erro)
 
+    if dataset.banco_horas.empty:
+        st.error("Falha ao carregar o DataFrame de Banco de Horas do GitHub.")
+        st.stop()
 
-# --- Funções e Carregamento de Dados ---
+    return dataset
 
-@st.cache_data(show_spinner="Carregando dados do GitHub...")
-def load_data_from_github(url, sheet_name):
-    """Carrega o arquivo Excel (XLSX) do link Raw do GitHub."""
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status() # Lança erro para códigos HTTP 4xx/5xx
-        # Lê o conteúdo binário da resposta e usa pd.read_excel
-        return pd.read_excel(io.BytesIO(response.content), sheet_name=sheet_name)
-    except Exception as e:
-        st.error(f"⚠️ Erro ao carregar dados do GitHub ({url}, Aba: {sheet_name}): {e}")
-        return pd.DataFrame()
-
-
-def convert_to_hours(time_str):
-    """Converte strings HH:MM para horas decimais, respeitando o sinal '-' inicial."""
-    if pd.isna(time_str) or str(time_str).strip() in ['00:00', '00:00:00']:
-        return 0.0
-    try:
-        is_negative = str(time_str).startswith('-')
-        if is_negative:
-            time_str = str(time_str)[1:]
-        parts = str(time_str).split(':')
-        hours = int(parts[0])
-        minutes = int(parts[1])
-        total_hours = hours + minutes / 60
-        # A função mantém o sinal original, se existir
-        return -total_hours if is_negative else total_hours
-    except (ValueError, IndexError):
-        return 0.0
-
-
-def format_decimal_to_hhmm(decimal_hours):
-    """Converte horas decimais para HH:MM, respeitando o sinal."""
-    if pd.isna(decimal_hours) or decimal_hours == 0:
-        return '00:00'
-    sinal = '-' if decimal_hours < 0 else ''
-    abs_hours = abs(decimal_hours)
-    horas = int(np.floor(abs_hours))
-    minutos_decimais = abs_hours - horas
-    minutos = int(round(minutos_decimais * 60))
-    if minutos == 60:
-        horas += 1
-        minutos = 0
-    return f"{sinal}{horas:02d}:{minutos:02d}"
-
-
-@st.cache_data
-def load_data():
-    # CHAMA A FUNÇÃO CORRIGIDA PARA XLSX
-    df_ocorrencias = load_data_from_github(URL_OCORRENCIAS, SHEET_OCORRENCIAS)
-    df_banco_horas = load_data_from_github(URL_BANCO_HORAS_RESUMO, SHEET_BANCO_HORAS)
-    
-    if df_banco_horas.empty:
-        st.error("Falha ao carregar o DataFrame de Banco de Horas do GitHub.")
-        st.stop()
-        
-    if not df_ocorrencias.empty:
-        try:
-            # Tenta processar Ocorrências (Mantido do original)
-            df_ocorrencias['Data'] = pd.to_datetime(
-                df_ocorrencias['Data'], errors='coerce', dayfirst=True)
-        except Exception:
-             # Se der erro no processamento, segue sem o df_ocorrencias
-             df_ocorrencias = pd.DataFrame()
-
-    try:
-        # 1. Converte Saldo Final (mantém o sinal original)
-        df_banco_horas['SaldoFinal_Horas'] = df_banco_horas['SaldoFinal'].apply(
-            convert_to_hours)
-        df_banco_horas['Saldo Final (HH:MM)'] = df_banco_horas['SaldoFinal_Horas'].apply(
-            format_decimal_to_hhmm)
-
-        # 2. Pagamentos (deve ser positivo - Garante que é um crédito)
-        df_banco_horas['Pagamentos_Horas'] = df_banco_horas['Pagamentos'].apply(
-            convert_to_hours).abs()
-        df_banco_horas['Pagamentos (HH:MM)'] = df_banco_horas['Pagamentos_Horas'].apply(
-            format_decimal_to_hhmm)
-
-        # 3. Descontos (deve ser negativo - Força o sinal para débito)
-        df_banco_horas['Descontos_Horas'] = - \
-            df_banco_horas['Descontos'].apply(convert_to_hours).abs()
-        df_banco_horas['Descontos (HH:MM)'] = df_banco_horas['Descontos_Horas'].apply(
-            format_decimal_to_hhmm)
-
-    except Exception as e:
-        st.error(f"Erro ao processar dados de Banco de Horas: {e}")
-        st.stop()
-
-    return df_ocorrencias, df_banco_horas
-
-
-df_ocorrencias, df_banco_horas = load_data()
+
+dataset = load_data()
+df_banco_horas, df_cubo, indice_filtros = dataset.banco_horas, dataset.cubo, dataset.indice_banco_horas
 
 
 # --- TÍTULO DA PÁGINA COM LOGO (Inalterado) ---
 col_logo, col_title, _ = st.columns([1, 4, 1])
 
 with col_logo:
-    try:
-        st.image("image_ccccb7.png", width=120)
-    except FileNotFoundError:
-        st.warning("Logotipo não encontrado.")
+    try:
+        st.image("image_ccccb7.png", width=120)
+    except FileNotFoundError:
+        st.warning("Logotipo não encontrado.")
 
 with col_title:
-    st.markdown(
-        f'<h1 style="color: {COR_PRINCIPAL_VERDE}; margin-bottom: 0px;">Dashboard Profarma - Banco de Horas</h1>', unsafe_allow_html=True)
-    st.markdown('Relatório e Detalhamento do Banco de Horas')
+    st.markdown(
+        f'<h1 style="color: {COR_PRINCIPAL_VERDE}; margin-bottom: 0px;">Dashboard Profarma - Banco de Horas</h1>', unsafe_allow_html=True)
+    st.markdown('Relatório e Detalhamento do Banco de Horas')
 st.markdown('---')
 
 
@@ -143,48 +65,247 @@ col_filter_est, col_filter_dep, col_filter_button = st.columns([1, 1, 0.5])
 
 # Inicializa o estado dos filtros
 if 'selected_establishment_banco' not in st.session_state:
-    st.session_state['selected_establishment_banco'] = []
+    st.session_state['selected_establishment_banco'] = []
 if 'selected_department_banco' not in st.session_state:
-    st.session_state['selected_department_banco'] = []
+    st.session_state['selected_department_banco'] = []
 
 
 def reset_filters_banco():
-    st.session_state['selected_establishment_banco'] = []
-    st.session_state['selected_department_banco'] = []
+    st.session_state['selected_establishment_banco'] = []
+    st.session_state['selected_department_banco'] = []
 
 
 # Botão de Limpar Filtros
 with col_filter_button:
-    st.write("")
-    st.write("")
-    st.button('Limpar Filtros', on_click=reset_filters_banco,
-              use_container_width=True)
+    st.write("")
+    st.write("")
+    st.button('Limpar Filtros', on_click=reset_filters_banco,
+              use_container_width=True)
 
 
 # 1. Filtro de Estabelecimento
 with col_filter_est:
-    todos_estabelecimentos = sorted(
-        list(df_banco_horas['Estabelecimento'].unique()))
-
-    selected_establishments = st.multiselect(
-        'Estabelecimento:',
-        options=todos_estabelecimentos,
-        key='selected_establishment_banco'
-    )
-
-# 2. Filtragem Inicial por Estabelecimento
-if selected_establishments:
-    df_banco_horas_filtrado = df_banco_horas[df_banco_horas['Estabelecimento'].isin(
-        selected_establishments)].copy()
-else:
-    df_banco_horas_filtrado = df_banco_horas.copy()
+    # opções já ordenadas, montadas na carga
+    todos_estabelecimentos = indice_filtros.options('Estabelecimento')
+
+    selected_establishments = st.multiselect(
+        'Estabelecimento:',
+        options=todos_estabelecimentos,
+        key='selected_establishment_banco'
+    )
+
+# 2. Escopo do Estabelecimento: união dos conjuntos de Departamentos pré-calculados na carga
+departamentos_escopo = indice_filtros.department_set(selected_establishments)
 
 # 3. Filtro de Departamento
 with col_filter_dep:
-    todos_departamentos = sorted(
-        list(df_banco_horas_filtrado['Departamento'].unique()))
-    current_selection_dep = st.session_state['selected_department_banco']
-    new_selection_dep = [
-        dep for dep in current_selection_dep if dep in todos_departamentos]
-    if set(current_selection_dep) != set(new_selection_dep):
-        st.session_state['selected_department_banco'] = new_selection_dep
+    todos_departamentos = sorted(departamentos_escopo)
+    current_selection_dep = st.session_state['selected_department_banco']
+    new_selection_dep = [
+        dep for dep in current_selection_dep if dep in departamentos_escopo]  # lookup em set
+    if set(current_selection_dep) != set(new_selection_dep):
+        st.session_state['selected_department_banco'] = new_selection_dep
+
+    selected_departments = st.multiselect(
+        'Departamento:',
+        options=todos_departamentos,
+        key='selected_department_banco'
+    )
+
+# --- LÓGICA DE TAMANHO DE GRÁFICO CONDICIONAL ---
+filtros_ativos = bool(selected_establishments or selected_departments)
+
+BASE_HEIGHT = 400
+if filtros_ativos:
+    CHART_HEIGHT = 250
+else:
+    CHART_HEIGHT = BASE_HEIGHT
+
+# Colunas exibidas nos detalhes: minutos inteiros para ordenar, HH:MM para leitura
+BASE_COLUMNS = {'Estabelecimento': 'Estabelecimento', 'Departamento': 'Departamento',
+                'Nome': 'Nome do Funcionário', 'Cargo': 'Cargo'}
+
+
+def ranking_estabelecimento(ranking_bh, coluna, positivo):
+    """Ranking por Estabelecimento de uma medida do cubo (minutos + rótulo HH:MM)."""
+    ranking = ranking_bh.loc[(ranking_bh[coluna] > 0) if positivo else (ranking_bh[coluna] < 0),
+                             ['Estabelecimento', coluna]]
+    ranking = ranking.sort_values(coluna, ascending=not positivo).reset_index(drop=True)
+    ranking['HH:MM'] = min_series_to_hhmm(ranking[coluna])
+    return ranking
+
+
+def detalhes(mask_filtro, coluna_min, coluna_hhmm, positivo, rotulo):
+    valores = df_banco_horas[coluna_min].to_numpy()
+    mask = (valores > 0) if positivo else (valores < 0)
+    if mask_filtro is not None:
+        mask &= mask_filtro
+    # ordem do ranking pré-calculada na carga: maior saldo/pagamento ou maior débito primeiro
+    linhas = ordered(dataset.ordens_banco_horas[(coluna_min, not positivo)], mask)
+    return project(df_banco_horas, linhas, {
+        **BASE_COLUMNS, coluna_min: f'{rotulo} (Minutos)', coluna_hhmm: f'{rotulo} (HH:MM)'})
+
+
+def calcular_filtro():
+    """Rankings e tabelas de detalhe do filtro atual (memoizados por seleção + versão)."""
+    # Rankings saem da fatia do cubo pré-agregado (mesmos filtros, sem varrer as linhas)
+    cubo_filtrado = cubo.slice_cube(df_cubo, selected_establishments, selected_departments)
+    ranking_bh = cubo.by_level(cubo_filtrado, 'Estabelecimento', [
+        'BH_Positivo_Min', 'BH_Negativo_Min', 'Pagamentos_Min', 'Descontos_Min'])
+    resultado = {
+        'ranking_positivo': ranking_estabelecimento(ranking_bh, 'BH_Positivo_Min', positivo=True),
+        'ranking_negativo': ranking_estabelecimento(ranking_bh, 'BH_Negativo_Min', positivo=False),
+        'ranking_pagamentos': ranking_estabelecimento(ranking_bh, 'Pagamentos_Min', positivo=True),
+        'ranking_descontos': ranking_estabelecimento(ranking_bh, 'Descontos_Min', positivo=False),
+    }
+
+    if filtros_ativos:
+        # AND dos bitmaps das duas dimensões; o frame só é lido na projeção das tabelas
+        mask_filtro = indice_filtros.mask(
+            Estabelecimento=selected_establishments, Departamento=selected_departments)
+        # 1. e 2. Saldo positivo / negativo
+        resultado['detalhes_positivo_df'] = detalhes(
+            mask_filtro, 'SaldoFinal_Min', 'Saldo Final (HH:MM)', True, 'Saldo')
+        resultado['detalhes_negativo_df'] = detalhes(
+            mask_filtro, 'SaldoFinal_Min', 'Saldo Final (HH:MM)', False, 'Saldo')
+        # 3. e 4. Pagamentos / Descontos
+        resultado['detalhes_pagamentos_df'] = detalhes(
+            mask_filtro, 'Pagamentos_Min', 'Pagamentos (HH:MM)', True, 'Pagamentos')
+        resultado['detalhes_descontos_df'] = detalhes(
+            mask_filtro, 'Descontos_Min', 'Descontos (HH:MM)', False, 'Descontos')
+    return resultado
+
+
+# Mesma seleção (em qualquer ordem) e mesma versão dos dados -> resultado do memo, sem recalcular
+resultado = memo.resultados.get_or_compute(
+    memo.filter_key('banco_horas', dataset.versao,
+                    selected_establishments, selected_departments),
+    calcular_filtro)
+
+
+def grafico_ranking(ranking, coluna, titulo, rotulo, cor, height):
+    return graficos.ranking_bars(
+        ranking['Estabelecimento'], ranking[coluna], text=ranking['HH:MM'],
+        height=height, titulo=titulo, titulo_x=rotulo,
+        titulo_y='Estabelecimento', cor=cor
+    )
+
+
+# --- GRÁFICOS DE SALDO FINAL ---
+st.markdown('---')
+st.subheader('Análise Gráfica por Saldo Final (Acúmulo)')
+
+ranking_positivo = resultado['ranking_positivo']
+ranking_negativo = resultado['ranking_negativo']
+
+col_ranking_pos, col_ranking_neg = st.columns(2)
+
+with col_ranking_pos:
+    st.markdown('##### Ranking de Horas Positivas')
+    if not ranking_positivo.empty:
+        fig_pos = graficos.cached_figure(
+            'bh_positivo', ranking_positivo, grafico_ranking,
+            coluna='BH_Positivo_Min',
+            titulo='Total de Horas Positivas no Escopo Selecionado',
+            rotulo='Total de Horas Positivas (min)', cor=COR_PRINCIPAL_VERDE, height=CHART_HEIGHT)
+        st.plotly_chart(fig_pos, use_container_width=True)
+    else:
+        st.info("Nenhum saldo positivo para o filtro selecionado.")
+
+with col_ranking_neg:
+    st.markdown('##### Ranking de Horas Negativas')
+    if not ranking_negativo.empty:
+        fig_neg = graficos.cached_figure(
+            'bh_negativo', ranking_negativo, grafico_ranking,
+            coluna='BH_Negativo_Min',
+            titulo='Total de Horas Negativas no Escopo Selecionado',
+            rotulo='Total de Horas Negativas (min)', cor=COR_CONTRASTE, height=CHART_HEIGHT)
+        st.plotly_chart(fig_neg, use_container_width=True)
+    else:
+        st.info("Nenhum saldo negativo para o filtro selecionado.")
+
+
+# --- GRÁFICOS DE PAGAMENTOS E DESCONTOS ---
+st.markdown('---')
+st.subheader('Análise Gráfica por Movimentação (Pagamento/Desconto)')
+
+ranking_pagamentos = resultado['ranking_pagamentos']
+ranking_descontos = resultado['ranking_descontos']
+
+col_ranking_pag, col_ranking_desc = st.columns(2)
+
+with col_ranking_pag:
+    st.markdown('##### Ranking de Horas Pagas')
+    if not ranking_pagamentos.empty:
+        fig_pag = graficos.cached_figure(
+            'bh_pagamentos', ranking_pagamentos, grafico_ranking,
+            coluna='Pagamentos_Min',
+            titulo='Total de Horas Pagas no Escopo Selecionado',
+            rotulo='Total de Horas Pagas (min)', cor=COR_PRINCIPAL_VERDE, height=CHART_HEIGHT)
+        st.plotly_chart(fig_pag, use_container_width=True)
+    else:
+        st.info("Nenhum pagamento de horas encontrado para o filtro selecionado.")
+
+with col_ranking_desc:
+    st.markdown('##### Ranking de Horas Descontadas')
+    if not ranking_descontos.empty:
+        fig_desc = graficos.cached_figure(
+            'bh_descontos', ranking_descontos, grafico_ranking,
+            coluna='Descontos_Min',
+            titulo='Total de Horas Descontadas no Escopo Selecionado',
+            rotulo='Total de Horas Descontadas (min)', cor=COR_CONTRASTE, height=CHART_HEIGHT)
+        st.plotly_chart(fig_desc, use_container_width=True)
+    else:
+        st.info("Nenhum desconto de horas encontrado para o filtro selecionado.")
+
+# --- DETALHAMENTO DO BANCO DE HORAS (DEPARTAMENTO ANTES DE NOME) ---
+
+if filtros_ativos:
+    st.markdown('---')
+
+    estabs_title = ", ".join(
+        selected_establishments) if selected_establishments else "Todos"
+    deps_title = ", ".join(
+        selected_departments) if selected_departments else "Todos"
+    st.subheader(
+        f'Detalhes do Banco de Horas e Movimentações para: **{estabs_title}** / **{deps_title}**')
+
+    detalhes_positivo_df = resultado['detalhes_positivo_df']
+    detalhes_negativo_df = resultado['detalhes_negativo_df']
+    detalhes_pagamentos_df = resultado['detalhes_pagamentos_df']
+    detalhes_descontos_df = resultado['detalhes_descontos_df']
+
+    def exibir_detalhes(df, key, msg_vazio):
+        if not df.empty:
+            paginated_dataframe(df, key=key)
+        else:
+            st.info(msg_vazio)
+
+    # --- EXIBIÇÃO EM 2 LINHAS DE 2 COLUNAS CADA ---
+
+    st.markdown('#### Resumo de Saldo Final')
+    detalhe_banco_col1, detalhe_banco_col2 = st.columns(2)
+
+    with detalhe_banco_col1:
+        st.subheader("Saldo Positivo Detalhado")
+        exibir_detalhes(detalhes_positivo_df, 'pagina_bh_positivo',
+                        "Nenhum saldo positivo encontrado para este filtro.")
+
+    with detalhe_banco_col2:
+        st.subheader("Saldo Negativo Detalhado")
+        exibir_detalhes(detalhes_negativo_df, 'pagina_bh_negativo',
+                        "Nenhum saldo negativo encontrado para este filtro.")
+
+    st.markdown('---')
+    st.markdown('#### Movimentações (Pagamentos e Descontos)')
+    detalhe_mov_col1, detalhe_mov_col2 = st.columns(2)
+
+    with detalhe_mov_col1:
+        st.subheader("Pagamentos de Horas Detalhados")
+        exibir_detalhes(detalhes_pagamentos_df, 'pagina_bh_pagamentos',
+                        "Nenhum pagamento de horas encontrado para este filtro.")
+
+    with detalhe_mov_col2:
+        st.subheader("Descontos de Horas Detalhados")
+        exibir_detalhes(detalhes_descontos_df, 'pagina_bh_descontos',
+                        "Nenhum desconto de horas encontrado para este filtro.")
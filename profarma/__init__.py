@@ -0,0 +1 @@
+# profarma/__init__.py (Camada de dados compartilhada dos dashboards Profarma)
@@ -0,0 +1,177 @@
+# profarma/cache.py (Cache em disco, endereçado por conteúdo, dos relatórios já lidos)
+
+import datetime as dt
+import hashlib
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from profarma import xlsx
+
+# Versão do formato/parser: mudar aqui invalida todas as entradas antigas
+CACHE_VERSION = "1"
+
+# Diretório compartilhado entre páginas e workers (sobrescrevível por variável de ambiente)
+CACHE_DIR = os.environ.get(
+    "PROFARMA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "profarma_cache")
+)
+# Limite total do cache; as versões mais antigas dos relatórios são removidas primeiro
+CACHE_MAX_BYTES = int(os.environ.get("PROFARMA_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+_EXT = ".parquet"
+
+_log = logging.getLogger(__name__)
+
+# Colunas object com tipos misturados (ex.: Matricula 123 e 'A45', Data em texto e serial)
+# não cabem num tipo do Parquet: vão como texto + uma coluna com o tipo de cada célula
+_TIPO = "__tipo__"
+_VAZIO, _TEXTO, _INTEIRO, _REAL, _LOGICO, _DATA = range(6)
+_RESTAURA = {
+    _VAZIO: lambda v: np.nan,
+    _TEXTO: str,
+    _INTEIRO: int,
+    _REAL: float,
+    _LOGICO: lambda v: v == "True",
+    _DATA: pd.Timestamp,
+}
+
+
+def content_key(raw: bytes, sheet_name: str) -> str:
+    """Hash SHA-256 dos bytes do arquivo + aba + versão do parser."""
+    h = hashlib.sha256()
+    h.update(raw)
+    h.update(b"\0")
+    h.update(sheet_name.encode("utf-8"))
+    h.update(b"\0" + CACHE_VERSION.encode("ascii"))
+    return h.hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key + _EXT)
+
+
+def _tipo(v) -> int:
+    if isinstance(v, str):
+        return _TEXTO
+    if isinstance(v, (bool, np.bool_)):
+        return _LOGICO
+    if isinstance(v, (int, np.integer)):
+        return _INTEIRO
+    if isinstance(v, (float, np.floating)):
+        return _VAZIO if np.isnan(v) else _REAL
+    if isinstance(v, (dt.datetime, np.datetime64)):
+        return _VAZIO if pd.isna(v) else _DATA
+    if v is None:
+        return _VAZIO
+    raise TypeError(f"tipo sem representação no cache: {type(v).__name__}")
+
+
+def _encode_mixed(df: pd.DataFrame) -> pd.DataFrame:
+    """Cópia com cada coluna de tipos misturados em texto + `__tipo__<coluna>` (int8)."""
+    saida = df
+    for col in df.columns[df.dtypes == object]:
+        if not pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            continue
+        if saida is df:
+            saida = df.copy()
+        tipos = np.array([_tipo(v) for v in df[col].to_numpy()], dtype=np.int8)
+        textos = [None if t == _VAZIO else (pd.Timestamp(v).isoformat() if t == _DATA else str(v))
+                  for v, t in zip(df[col].to_numpy(), tipos)]
+        saida[col] = pd.Series(textos, index=df.index, dtype=object)
+        saida[_TIPO + col] = tipos
+    return saida
+
+
+def _decode_mixed(df: pd.DataFrame) -> pd.DataFrame:
+    """Desfaz o _encode_mixed: cada célula volta ao tipo original."""
+    for marca in [c for c in df.columns if isinstance(c, str) and c.startswith(_TIPO)]:
+        col = marca[len(_TIPO):]
+        tipos = df.pop(marca).to_numpy()
+        valores = [_RESTAURA[t](v) for t, v in zip(tipos.tolist(), df[col].to_numpy())]
+        df[col] = pd.Series(valores, index=df.index, dtype=object)
+    return df
+
+
+def get(key: str) -> pd.DataFrame | None:
+    """Lê a entrada do cache (ou None). Marca o acesso para a política LRU."""
+    path = _path(key)
+    try:
+        df = pd.read_parquet(path)
+    except (FileNotFoundError, OSError, ValueError, ImportError):
+        return None
+    try:
+        os.utime(path)  # usado como "último acesso" na evicção
+    except OSError:
+        pass
+    df = _decode_mixed(df)
+    # Parquet devolve None em texto ausente; mantém NaN como na leitura original
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def put(key: str, df: pd.DataFrame) -> bool:
+    """Grava o DataFrame de forma atômica (tmp + rename) e aplica o limite de tamanho."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        os.close(fd)
+        try:
+            _encode_mixed(df).to_parquet(tmp, index=False)
+            os.replace(tmp, _path(key))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    except Exception as e:
+        # Cache é só otimização: falha de disco/serialização não pode derrubar a página,
+        # mas fica registrada (sem ela toda carga volta a ler o XLSX)
+        _log.warning("Relatório não gravado no cache (%s): %s", _path(key), e)
+        return False
+    evict(keep=key)
+    return True
+
+
+def evict(max_bytes: int = None, keep: str = None) -> None:
+    """Remove as entradas menos usadas até o total caber em max_bytes."""
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        names = [n for n in os.listdir(CACHE_DIR) if n.endswith(_EXT)]
+    except OSError:
+        return
+    entries = []
+    for name in names:
+        try:
+            info = os.stat(os.path.join(CACHE_DIR, name))
+        except OSError:
+            continue
+        entries.append((info.st_mtime, info.st_size, name))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and name == keep + _EXT:
+            continue
+        try:
+            os.remove(os.path.join(CACHE_DIR, name))
+            total -= size
+        except OSError:
+            pass
+
+
+def read_sheet_cached(raw: bytes, sheet_name: str, key: str = None) -> pd.DataFrame:
+    """
+    Lê a aba via cache em disco:
+    - Mesmo conteúdo (hash dos bytes) -> recarrega o Parquet já tipado, sem reparsear o XLSX.
+    - Conteúdo novo -> lê com o leitor em streaming e grava no cache.
+    """
+    key = key or content_key(raw, sheet_name)
+    df = get(key)
+    if df is not None:
+        return df
+    df = xlsx.read_sheet(raw, sheet_name)
+    put(key, df)
+    return df
@@ -0,0 +1,92 @@
+# profarma/cubo.py (Cubo pré-agregado Estabelecimento × Departamento para KPIs e gráficos)
+
+import numpy as np
+import pandas as pd
+
+DIMENSOES = ["Estabelecimento", "Departamento"]
+
+# Medidas de Ocorrências (contagens) e de Banco de Horas (minutos)
+MEDIDAS_OCORRENCIAS = ["Qtd_Ocorrencias", "Total_Faltas", "Total_Impares", "Total_Sem_Marcacao"]
+MEDIDAS_BANCO_HORAS = ["Qtd_Banco_Horas", "BH_Positivo_Min", "BH_Negativo_Min", "Pagamentos_Min", "Descontos_Min"]
+
+
+def build_cube(df_ocorrencias: pd.DataFrame, df_banco_horas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega os dois relatórios por (Estabelecimento, Departamento), uma vez por carga.
+    Tudo é aditivo: qualquer combinação de filtros vira fatia + soma deste cubo,
+    sem voltar às linhas brutas.
+    """
+    partes = []
+
+    if not df_ocorrencias.empty and all(c in df_ocorrencias.columns for c in DIMENSOES):
+        oc = pd.DataFrame({
+            "Qtd_Ocorrencias": np.ones(len(df_ocorrencias), dtype=np.int64),
+            "Total_Faltas": df_ocorrencias["is_falta_nao_justificada"].astype(np.int64),
+            "Total_Impares": df_ocorrencias["is_impar"].astype(np.int64),
+            "Total_Sem_Marcacao": df_ocorrencias["is_sem_marcacao"].astype(np.int64),
+        })
+        for dim in DIMENSOES:
+            oc[dim] = df_ocorrencias[dim].to_numpy()
+        partes.append(oc.groupby(DIMENSOES, dropna=False, observed=True).sum())
+
+    if not df_banco_horas.empty and all(c in df_banco_horas.columns for c in DIMENSOES):
+        saldo = df_banco_horas["SaldoFinal_Min"]
+        bh = pd.DataFrame({
+            "Qtd_Banco_Horas": np.ones(len(df_banco_horas), dtype=np.int64),
+            "BH_Positivo_Min": saldo.clip(lower=0),
+            "BH_Negativo_Min": saldo.clip(upper=0),
+            "Pagamentos_Min": df_banco_horas["Pagamentos_Min"].clip(lower=0),
+            "Descontos_Min": df_banco_horas["Descontos_Min"].clip(upper=0),
+        })
+        for dim in DIMENSOES:
+            bh[dim] = df_banco_horas[dim].to_numpy()
+        partes.append(bh.groupby(DIMENSOES, dropna=False, observed=True).sum())
+
+    colunas = MEDIDAS_OCORRENCIAS + MEDIDAS_BANCO_HORAS
+    if not partes:
+        vazio = pd.MultiIndex.from_arrays([[], []], names=DIMENSOES)
+        return pd.DataFrame(columns=colunas, index=vazio, dtype=np.int64)
+
+    cubo = pd.concat(partes, axis=1).reindex(columns=colunas).fillna(0).astype(np.int64)
+    cubo.index.names = DIMENSOES
+    return cubo.sort_index()
+
+
+def patch_cube(cubo: pd.DataFrame, saidas_oc: pd.DataFrame, entradas_oc: pd.DataFrame,
+               saidas_bh: pd.DataFrame, entradas_bh: pd.DataFrame) -> pd.DataFrame:
+    """
+    Atualiza o cubo de uma carga anterior com o delta das linhas (ver profarma.delta):
+    subtrai a contribuição das que saíram e soma a das que entraram. Como toda medida é
+    aditiva, o resultado é igual ao build_cube do relatório novo inteiro.
+    """
+    sai = build_cube(saidas_oc, saidas_bh)
+    entra = build_cube(entradas_oc, entradas_bh)
+    if sai.empty and entra.empty:
+        return cubo
+    novo = pd.concat([cubo, entra, -sai]).groupby(level=DIMENSOES, dropna=False, sort=True).sum()
+    # célula sem nenhuma linha de nenhum relatório deixa de existir (como no build_cube)
+    vivas = (novo["Qtd_Ocorrencias"] != 0) | (novo["Qtd_Banco_Horas"] != 0)
+    novo = novo[vivas].astype(np.int64)
+    novo.index = novo.index.remove_unused_levels()
+    return novo
+
+
+def slice_cube(cubo: pd.DataFrame, estabelecimentos=None, departamentos=None) -> pd.DataFrame:
+    """Células do cubo dentro da seleção (lista vazia/None = sem filtro naquela dimensão)."""
+    mask = np.ones(len(cubo), dtype=bool)
+    if estabelecimentos:
+        mask &= cubo.index.get_level_values("Estabelecimento").isin(estabelecimentos)
+    if departamentos:
+        mask &= cubo.index.get_level_values("Departamento").isin(departamentos)
+    return cubo[mask]
+
+
+def totals(fatia: pd.DataFrame) -> pd.Series:
+    """Soma de todas as medidas da fatia (valores dos cards de KPI)."""
+    return fatia.sum().astype(np.int64)
+
+
+def by_level(fatia: pd.DataFrame, nivel: str, medidas: list) -> pd.DataFrame:
+    """Soma das medidas por Estabelecimento ou Departamento (base dos rankings)."""
+    # observed=True: com dimensões categóricas, só as categorias presentes na fatia
+    return fatia.groupby(level=nivel, observed=True)[medidas].sum().reset_index()
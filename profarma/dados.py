@@ -0,0 +1,491 @@
+# profarma/dados.py (Camada de dados única: download, leitura e processamento dos relatórios)
+
+import hashlib
+import io
+import os
+import threading
+import time
+import unicodedata  # >>> normalizar nomes de abas e evitar problemas com acentos/espacos
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from profarma import cache, datas, delta, fontes, horas, xlsx
+from profarma.cubo import build_cube, patch_cube
+from profarma.indice import FilterIndex
+
+# --- URLs BRUTAS DO GITHUB (XLSX) ---
+REPO_URL_BASE = 'https://raw.githubusercontent.com/oliveirafabio8813-design/meu-dashboard-profarma/main/Dashboard/'
+
+ARQUIVO_OCORRENCIAS = 'Relatorio_OcorrenciasNoPonto.xlsx'
+SHEET_OCORRENCIAS = 'OcorrênciasnoPonto'  # confere com a sua planilha
+ARQUIVO_BANCO_HORAS = 'Relatorio_ContaCorrenteBancoDeHorasResumo.xlsx'
+SHEET_BANCO_HORAS = 'ContaCorrenteBancodeHorasResum'  # confere com a sua planilha
+
+# Colunas de dimensão (poucos valores distintos, repetidos milhares de vezes) viram category
+COLUNAS_CATEGORICAS = [
+    "Estabelecimento", "Departamento", "Cargo", "CentroDeCustos", "Empresa",
+    "Ocorrencia", "Justificativa", "TipoOcorrencia",
+]
+
+# Ordens das tabelas de detalhe do Banco de Horas: (coluna, ascendente)
+ORDENS_BANCO_HORAS = [
+    ("SaldoFinal_Min", False),   # saldo positivo: maior primeiro
+    ("SaldoFinal_Min", True),    # saldo negativo: mais negativo primeiro
+    ("Pagamentos_Min", False),
+    ("Descontos_Min", True),
+]
+
+# Tempo de vida do dataset em memória (mesmo TTL do antigo @st.cache_data)
+TTL_SEGUNDOS = 3600
+# Renovação em segundo plano: quanto antes do vencimento recarregar e, se falhar, quando tentar de novo
+RENOVAR_ANTES_SEGUNDOS = int(os.environ.get("PROFARMA_RENOVAR_ANTES_S", "300"))
+RENOVAR_RETRY_SEGUNDOS = int(os.environ.get("PROFARMA_RENOVAR_RETRY_S", "60"))
+
+HEADERS = {
+    "User-Agent": "Profarma-Streamlit/1.0 (+https://github.com/oliveirafabio8813-design)",
+    "Accept": "*/*",
+    # no-cache força a CDN a revalidar; com If-None-Match a resposta vira um 304 leve
+    "Cache-Control": "no-cache",
+    "Pragma": "no-cache",
+}
+
+
+class Dataset(NamedTuple):
+    """Relatórios processados, compartilhados (somente leitura) por todas as sessões."""
+    ocorrencias: pd.DataFrame
+    banco_horas: pd.DataFrame
+    cubo: pd.DataFrame  # Estabelecimento × Departamento pré-agregado (profarma.cubo)
+    indice_ocorrencias: FilterIndex   # bitmaps de linhas para os filtros das páginas
+    indice_banco_horas: FilterIndex
+    ordens_banco_horas: dict          # (coluna, ascendente) -> permutação estável das linhas
+    erros: list      # falhas de carga/processamento (a página decide se para)
+    avisos: list     # avisos não fatais (ex.: aba não encontrada)
+    versao: str      # hash do conteúdo dos dois relatórios
+
+
+# --------------------------------------
+# Utilidades
+# --------------------------------------
+def _normalize(s: str) -> str:
+    """Remove acentos e espaços para facilitar comparações."""
+    if not isinstance(s, str):
+        s = str(s)
+    s = unicodedata.normalize('NFKD', s).encode('ascii', 'ignore').decode('ascii')
+    return s.replace(" ", "").lower()
+
+def _is_html(b: bytes) -> bool:
+    head = b[:4096].lower()
+    return (b"<html" in head) or (b"<table" in head and b"</table" in head)
+
+def _is_xlsx_zip(b: bytes) -> bool:
+    # .xlsx/.xlsm são ZIP com entradas características
+    try:
+        with zipfile.ZipFile(io.BytesIO(b)) as zf:
+            names = set(zf.namelist())
+            return {"[Content_Types].xml", "xl/workbook.xml"} <= names
+    except zipfile.BadZipFile:
+        return False
+
+def _check_xlsx_bytes(raw: bytes) -> None:
+    """Garante que os bytes recebidos são mesmo um XLSX (levanta ValueError caso contrário)."""
+    if not raw:
+        raise ValueError("Arquivo vazio recebido do GitHub.")
+
+    # 1) HTML retornado (erro/limite do GitHub)
+    if _is_html(raw):
+        raise ValueError("O GitHub retornou HTML (provável 404/limite de taxa). Verifique a URL ou tente novamente.")
+
+    # 2) Confirma estrutura ZIP de XLSX
+    if not _is_xlsx_zip(raw):
+        # pode ser CSV ou texto plano
+        text = raw.decode("utf-8", errors="ignore")
+        if ";" in text or "," in text:
+            raise ValueError("O link retornou CSV/TEXTO, não XLSX. Baixe o arquivo correto ou troque o parser.")
+        raise ValueError("O link não parece um XLSX válido (não é um ZIP de Excel).")
+
+# --------------------------------------
+# Origem dos relatórios (HTTP por padrão; arquivo local ou pasta por configuração, ver profarma.fontes)
+# --------------------------------------
+# Resolvida na primeira leitura: configuração inválida vira erro do Dataset, não do import
+_fonte = None
+_fonte_lock = threading.Lock()
+
+def source() -> fontes.Fonte:
+    """Fonte configurada (PROFARMA_FONTE...), criada na primeira chamada; ValueError se inválida."""
+    global _fonte
+    with _fonte_lock:
+        if _fonte is None:
+            _fonte = fontes.from_config(padrao=REPO_URL_BASE, headers=HEADERS, timeout=30,
+                                        validate=_check_xlsx_bytes)
+        return _fonte
+
+def set_source(fonte: fontes.Fonte) -> None:
+    """Troca a origem dos relatórios (ex.: UploadFonte, servidor HTTP local em testes) e descarta o dataset."""
+    global _fonte
+    with _fonte_lock:
+        _fonte = fonte
+    clear()
+
+def _describe(nome: str) -> str:
+    """Origem do relatório para mensagens de erro (só o nome se a fonte nem chegou a ser criada)."""
+    fonte = _fonte
+    return fonte.describe(nome) if fonte is not None else nome
+
+def load_report(nome: str, sheet_name: str, avisos: list = None) -> tuple:
+    """Lê o relatório `nome` da fonte configurada -> (DataFrame, chave_do_conteúdo)."""
+    fonte = source()
+    raw = fonte.read(nome)
+    return read_report(raw, sheet_name, origem=fonte.location(nome), avisos=avisos)
+
+# --------------------------------------
+# Leitura robusta (XLSX em memória, qualquer fonte)
+# --------------------------------------
+def read_report(raw: bytes, sheet_name: str, origem: str = "", avisos: list = None) -> tuple:
+    """
+    Lê a aba de um XLSX já em memória (download, arquivo local, ingestão do histórico).
+    Devolve (DataFrame, chave_do_conteúdo). Aba ausente -> 1ª aba, registrada em `avisos`.
+    """
+    # Lê a planilha em streaming (sheet.xml + sharedStrings.xml, sem openpyxl)
+    sheet_names = xlsx.sheet_names(raw)
+    # sanity check da aba
+    sn_target = _normalize(sheet_name)
+    sheet_found = None
+    for sn in sheet_names:
+        if _normalize(sn) == sn_target:
+            sheet_found = sn
+            break
+
+    if sheet_found is None:
+        # tenta a primeira aba e avisa
+        sheet_found = sheet_names[0]
+        if avisos is not None:
+            avisos.append(
+                f"Aba '{sheet_name}' não encontrada em '{origem}'. "
+                f"Usando a primeira aba do arquivo: '{sheet_found}'."
+            )
+
+    # Mesmo arquivo (hash dos bytes) já lido antes -> recarrega o Parquet do cache
+    key = cache.content_key(raw, sheet_found)
+    df = cache.read_sheet_cached(raw, sheet_found, key=key)
+    return df, key
+
+# --------------------------------------
+# Checks auxiliares
+# --------------------------------------
+def count_marcacoes(marcacoes: pd.Series) -> pd.Series:
+    """Quantidade de batidas por linha (tokens separados por espaço), em int16; vazio = 0."""
+    texto = marcacoes.astype(str).where(marcacoes.notna(), "")
+    return texto.str.count(r"\S+").astype(np.int16)
+
+# --------------------------------------
+# Processamento
+# --------------------------------------
+def derive_ocorrencias(df: pd.DataFrame) -> pd.DataFrame:
+    """Todas as flags derivadas (is_impar, is_sem_marcacao, is_falta_nao_justificada) saem daqui, linha a linha e sem reordenar."""
+    if "Data" in df.columns:
+        # formato detectado (datetime / serial do Excel / dd/mm/aaaa) e convertido por caminho fixo
+        df["Data"], _ = datas.parse_dates(df["Data"])
+
+    # contagem de batidas calculada uma vez; a paridade sai dela sem Python por linha
+    if "Marcacoes" in df.columns:
+        df["qtd_marcacoes"] = count_marcacoes(df["Marcacoes"])
+        df["is_impar"] = (df["qtd_marcacoes"] % 2) != 0
+    else:
+        df["qtd_marcacoes"] = np.int16(0)
+        df["is_impar"] = False
+    df["is_sem_marcacao"] = df["Ocorrencia"].isin(
+        ["Sem marcação de entrada", "Sem marcação de saída"]
+    ) if "Ocorrencia" in df.columns else False
+
+    # Falta não justificada: Ocorrencia == 'Falta' e Justificativa == 'Falta' (booleano, vetorizado)
+    if "Ocorrencia" in df.columns and "Justificativa" in df.columns:
+        df["is_falta_nao_justificada"] = (df["Ocorrencia"] == "Falta") & (df["Justificativa"] == "Falta")
+    else:
+        df["is_falta_nao_justificada"] = False
+    return df
+
+def finish_ocorrencias(df: pd.DataFrame, originais: pd.Series, avisos: list) -> pd.DataFrame:
+    """Avisos sobre a coluna Data (`originais` = valores brutos x convertidos) e ordem das tabelas de detalhe."""
+    if originais is not None:
+        invalidas = datas.filled(originais) & df["Data"].isna()
+        if invalidas.any():
+            exemplos = ", ".join(repr(v) for v in pd.unique(originais[invalidas])[:3])
+            avisos.append(
+                f"{int(invalidas.sum())} linha(s) de Ocorrências com 'Data' fora do formato "
+                f"esperado ({datas.FORMATO_DATA}) ficaram sem data. Exemplos: {exemplos}."
+            )
+    else:
+        avisos.append("Coluna 'Data' não encontrada em Ocorrências.")
+
+    # Ordem das tabelas de detalhe (Nome, Data) aplicada uma vez: seleções por posição já saem ordenadas
+    if "Nome" in df.columns and "Data" in df.columns:
+        return df.sort_values(["Nome", "Data"], kind="mergesort", na_position="last").reset_index(drop=True)
+    return df.copy()
+
+def process_ocorrencias(df: pd.DataFrame, avisos: list) -> pd.DataFrame:
+    """Processamento completo de Ocorrências (sem estado incremental)."""
+    originais = df["Data"].copy() if "Data" in df.columns else None
+    return finish_ocorrencias(derive_ocorrencias(df), originais, avisos)
+
+def process_banco_horas(df: pd.DataFrame) -> pd.DataFrame:
+    """Banco de Horas: trabalhar em minutos (evita erro de arredondamento)."""
+    if not all(c in df.columns for c in ["SaldoFinal", "Pagamentos", "Descontos"]):
+        raise ValueError("Colunas de horas ('SaldoFinal', 'Pagamentos', 'Descontos') não encontradas no Banco de Horas.")
+
+    # SaldoFinal_Min, Pagamentos_Min, Descontos_Min em uma passada por coluna
+    horas.add_minute_columns(df, ["SaldoFinal", "Pagamentos", "Descontos"])
+    df["Pagamentos_Min"]   = df["Pagamentos_Min"].abs()    # crédito: sempre positivo
+    df["Descontos_Min"]    = -df["Descontos_Min"].abs()    # débito: sempre negativo
+
+    # Colunas de exibição formatadas em lote (sem passar por horas decimais)
+    df["Saldo Final (HH:MM)"] = horas.min_series_to_hhmm(df["SaldoFinal_Min"])
+    df["Pagamentos (HH:MM)"]  = horas.min_series_to_hhmm(df["Pagamentos_Min"])
+    df["Descontos (HH:MM)"]   = horas.min_series_to_hhmm(df["Descontos_Min"])
+    return df
+
+def ranking_orders(df: pd.DataFrame) -> dict:
+    """Permutações estáveis das linhas por cada chave de ranking (ver ORDENS_BANCO_HORAS)."""
+    ordens = {}
+    for coluna, ascendente in ORDENS_BANCO_HORAS:
+        if coluna not in df.columns:
+            continue
+        valores = df[coluna].to_numpy()
+        ordens[(coluna, ascendente)] = np.argsort(valores if ascendente else -valores, kind="stable")
+    return ordens
+
+def encode_categoricals(frames: list, columns: list = None) -> None:
+    """
+    Converte as colunas de dimensão para category, no lugar, com categorias estáveis:
+    valores distintos ordenados, unidos entre os relatórios que têm a mesma coluna.
+    Assim Estabelecimento/Departamento compartilham os mesmos códigos em Ocorrências e
+    Banco de Horas, e isin/unique/groupby trabalham sobre inteiros.
+    """
+    for col in COLUNAS_CATEGORICAS if columns is None else columns:
+        presentes = [df for df in frames if col in df.columns]
+        if not presentes:
+            continue
+        valores = pd.concat([df[col] for df in presentes], ignore_index=True).dropna()
+        # colunas mistas (ex.: códigos numéricos e texto) ficam como estão
+        if pd.api.types.infer_dtype(valores, skipna=True) not in ("string", "empty"):
+            continue
+        tipo = pd.CategoricalDtype(sorted(valores.unique()), ordered=False)
+        for df in presentes:
+            df[col] = df[col].astype(tipo)
+
+# Estado incremental por relatório: só as linhas novas/alteradas são reprocessadas
+_incremental_ocorrencias = delta.Incremental(delta.CHAVE_OCORRENCIAS, derive_ocorrencias)
+_incremental_banco_horas = delta.Incremental(delta.CHAVE_BANCO_HORAS, process_banco_horas)
+_cubo_anterior = {}  # "cubo" -> cubo da última carga completa (base do patch)
+
+def _load_ocorrencias(avisos: list) -> tuple:
+    """Download + leitura + derivação incremental de Ocorrências -> (df, chave, delta)."""
+    bruto, key = load_report(ARQUIVO_OCORRENCIAS, SHEET_OCORRENCIAS, avisos)
+    originais = bruto["Data"].copy() if "Data" in bruto.columns else None
+    derivado, delta_oc = _incremental_ocorrencias.apply(bruto, key)
+    return finish_ocorrencias(derivado, originais, avisos), key, delta_oc
+
+def _load_banco_horas(avisos: list) -> tuple:
+    """Download + leitura + derivação incremental do Banco de Horas -> (df, chave, delta)."""
+    bruto, key = load_report(ARQUIVO_BANCO_HORAS, SHEET_BANCO_HORAS, avisos)
+    derivado, delta_bh = _incremental_banco_horas.apply(bruto, key)
+    # cópia: encode_categoricals altera no lugar e o derivado pertence ao estado incremental
+    return derivado.copy(), key, delta_bh
+
+def build_dataset() -> Dataset:
+    """Baixa, lê e processa os dois relatórios (sem Streamlit: roda em qualquer thread)."""
+    erros = []
+    avisos_oc, avisos_bh = [], []  # uma lista por relatório: a ordem dos avisos não depende de qual termina antes
+
+    # Os dois relatórios em paralelo: a leitura de um se sobrepõe ao download do outro
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="profarma-carga") as pool:
+        futuro_oc = pool.submit(_load_ocorrencias, avisos_oc)
+        futuro_bh = pool.submit(_load_banco_horas, avisos_bh)
+
+    try:
+        df_ocorrencias, key_oc, delta_oc = futuro_oc.result()
+    except Exception as e:
+        erros.append(f"⚠️ Erro ao carregar dados ({_describe(ARQUIVO_OCORRENCIAS)}, Aba: {SHEET_OCORRENCIAS}): {e}")
+        df_ocorrencias, key_oc, delta_oc = pd.DataFrame(), "", None
+
+    try:
+        df_banco_horas, key_bh, delta_bh = futuro_bh.result()
+    except Exception as e:
+        erros.append(f"⚠️ Erro ao carregar dados ({_describe(ARQUIVO_BANCO_HORAS)}, Aba: {SHEET_BANCO_HORAS}): {e}")
+        df_banco_horas, key_bh, delta_bh = pd.DataFrame(), "", None
+    avisos = avisos_oc + avisos_bh
+
+    # Cubo: patch do anterior quando os dois relatórios têm delta; senão, agregação completa
+    anterior = _cubo_anterior.pop("cubo", None)
+    if anterior is not None and delta_oc is not None and delta_bh is not None:
+        cubo = patch_cube(anterior, delta_oc.saidas, delta_oc.entradas, delta_bh.saidas, delta_bh.entradas)
+    else:
+        cubo = build_cube(df_ocorrencias, df_banco_horas)
+    if not erros:
+        _cubo_anterior["cubo"] = cubo
+
+    encode_categoricals([df_ocorrencias, df_banco_horas])
+    indice_oc = FilterIndex(df_ocorrencias)
+    indice_bh = FilterIndex(df_banco_horas)
+    ordens_bh = ranking_orders(df_banco_horas)
+
+    versao = hashlib.sha256(f"{key_oc}:{key_bh}".encode("ascii")).hexdigest()[:16]
+    return Dataset(df_ocorrencias, df_banco_horas, cubo, indice_oc, indice_bh, ordens_bh, erros, avisos, versao)
+
+# --------------------------------------
+# Single-flight: uma carga em andamento por processo
+# --------------------------------------
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Garante uma única execução em andamento por chave: chamadas concorrentes
+    esperam a que já está rodando e recebem o mesmo resultado (ou o mesmo erro).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+_flight = SingleFlight()
+_store_lock = threading.Lock()
+_store = {}  # chave -> (expira_em, Dataset)
+
+def _load_and_store(ttl: float) -> Dataset:
+    """Carga completa; só um dataset sem erros substitui o atual (troca atômica da entrada)."""
+    dataset = build_dataset()
+    # falha não fica em cache: quem já tem uma versão continua com ela
+    if not dataset.erros:
+        with _store_lock:
+            _store["dataset"] = (time.monotonic() + ttl, dataset)
+    return dataset
+
+# --------------------------------------
+# Renovação em segundo plano (stale-while-revalidate)
+# --------------------------------------
+class Refresher:
+    """
+    Thread daemon que recarrega o dataset RENOVAR_ANTES_SEGUNDOS antes de vencer.
+    - As sessões continuam recebendo a versão atual durante a recarga (nunca esperam a rede).
+    - A versão nova entra de uma vez no _store; as sessões a pegam no próximo rerun.
+    - Recarga com erro: mantém a versão atual e tenta de novo após RENOVAR_RETRY_SEGUNDOS.
+    """
+
+    def __init__(self, antes: float = RENOVAR_ANTES_SEGUNDOS, retry: float = RENOVAR_RETRY_SEGUNDOS):
+        self.antes = antes
+        self.retry = retry
+        self.ttl = TTL_SEGUNDOS
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def start(self, ttl: float = TTL_SEGUNDOS) -> None:
+        """Inicia a thread (uma por processo; chamadas seguintes não fazem nada)."""
+        with self._lock:
+            self.ttl = ttl
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._run, name="profarma-refresher", daemon=True)
+            self._thread.start()
+
+    def wake(self) -> None:
+        """Antecipa a recarga (ex.: uma sessão encontrou o dataset já vencido)."""
+        self._acordar.set()
+
+    def stop(self) -> None:
+        self._parar.set()
+        self._acordar.set()
+
+    def _delay(self) -> float:
+        with _store_lock:
+            entry = _store.get("dataset")
+        if entry is None:
+            return self.retry
+        # TTL curto: renova no meio da vida, não em laço contínuo
+        antes = min(self.antes, self.ttl / 2)
+        return max(0.0, entry[0] - antes - time.monotonic())
+
+    def _run(self) -> None:
+        espera = self._delay()
+        while True:
+            self._acordar.wait(espera)
+            self._acordar.clear()
+            if self._parar.is_set():
+                return
+            try:
+                dataset = _flight.do("dataset", lambda: _load_and_store(self.ttl))
+                ok = not dataset.erros
+            except Exception:
+                ok = False
+            espera = self._delay() if ok else self.retry
+
+_refresher = Refresher()
+
+def get_dataset(ttl: float = TTL_SEGUNDOS) -> Dataset:
+    """
+    Dataset compartilhado pelo processo inteiro (página inicial e páginas de detalhe).
+    - Com uma versão em memória, devolve o mesmo objeto sem copiar (trate como somente leitura);
+      a renovação acontece em segundo plano (Refresher), mesmo depois do TTL.
+    - Sem nenhuma versão (primeira carga ou falha), a primeira sessão dispara a carga e as demais esperam.
+    """
+    with _store_lock:
+        entry = _store.get("dataset")
+    if entry is not None:
+        _refresher.start(ttl)
+        if entry[0] <= time.monotonic():
+            _refresher.wake()  # vencido: serve o anterior e recarrega fora da renderização
+        return entry[1]
+
+    def _load():
+        # outra sessão pode ter concluído a carga enquanto esta esperava o lock
+        with _store_lock:
+            current = _store.get("dataset")
+        if current is not None:
+            return current[1]
+        return _load_and_store(ttl)
+
+    dataset = _flight.do("dataset", _load)
+    _refresher.start(ttl)
+    return dataset
+
+def clear() -> None:
+    """Descarta o dataset em memória (a próxima chamada recarrega)."""
+    with _store_lock:
+        _store.clear()
+    _incremental_ocorrencias.clear()
+    _incremental_banco_horas.clear()
+    _cubo_anterior.clear()
@@ -0,0 +1,86 @@
+# profarma/datas.py (Leitura da coluna Data com formato explícito: datetime, serial do Excel ou dd/mm/aaaa)
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from profarma.xlsx import EXCEL_EPOCH
+
+FORMATO_DATA = "%d/%m/%Y"
+
+
+def _serial(valores) -> pd.Series:
+    """Seriais do Excel (dias desde 1899-12-30) -> datetime, só aritmética."""
+    dias = pd.to_numeric(pd.Series(valores), errors="coerce")
+    return (EXCEL_EPOCH + pd.to_timedelta(dias, unit="D")).dt.round("ms")
+
+
+def detect_format(values: pd.Series) -> str:
+    """'datetime', 'serial', 'texto' ou 'misto' (tipos diferentes na mesma coluna)."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return "datetime"
+    if pd.api.types.is_numeric_dtype(values):
+        return "serial"
+    tipo = pd.api.types.infer_dtype(values, skipna=True)
+    if tipo in ("datetime", "datetime64", "date"):
+        return "datetime"
+    if tipo in ("integer", "floating", "mixed-integer-float"):
+        return "serial"
+    if tipo in ("string", "empty"):
+        return "texto"
+    return "misto"
+
+
+def filled(values: pd.Series) -> pd.Series:
+    """Células preenchidas (nem NaN/NaT, nem texto em branco): as que deveriam virar data."""
+    preenchidas = values.notna()
+    if detect_format(values) in ("texto", "misto"):
+        # .str devolve NaN para o que não é texto (datas/números da coluna mista)
+        preenchidas &= ~values.str.strip().eq("").fillna(False).astype(bool)
+    return preenchidas
+
+
+def parse_dates(values: pd.Series) -> tuple:
+    """
+    Converte a coluna em datetime64 por um caminho fixo, sem inferência de formato:
+    - datetime: repassa; serial: aritmética sobre a época do Excel; texto: FORMATO_DATA.
+    - Coluna mista: cada valor distinto vai pelo caminho do seu tipo.
+    Devolve (datas, invalidas): `invalidas` marca as células preenchidas que não viraram data.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    formato = detect_format(s)
+
+    if formato == "datetime":
+        datas = pd.to_datetime(s)
+        return datas, s.notna() & datas.isna()
+    if formato == "serial":
+        datas = _serial(s.to_numpy())
+        datas.index = s.index
+        return datas, s.notna() & datas.isna()
+
+    # só os valores distintos são convertidos (relatórios repetem muito as mesmas datas)
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    convertidos = pd.Series(pd.NaT, index=range(len(uniques)), dtype="datetime64[ns]")
+
+    e_texto = np.array([isinstance(v, str) for v in uniques], dtype=bool)
+    e_data = np.array([isinstance(v, (dt.datetime, dt.date, np.datetime64)) for v in uniques], dtype=bool)
+    e_numero = ~(e_texto | e_data) & np.array(
+        [isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in uniques], dtype=bool)
+
+    vazios = np.zeros(len(uniques), dtype=bool)
+    if e_texto.any():
+        textos = pd.Series(uniques[e_texto]).str.strip()
+        vazios[e_texto] = (textos == "").to_numpy()
+        convertidos[e_texto] = pd.to_datetime(textos, format=FORMATO_DATA, errors="coerce").to_numpy()
+    if e_data.any():
+        convertidos[e_data] = pd.to_datetime(pd.Series(uniques[e_data]), errors="coerce").to_numpy()
+    if e_numero.any():
+        convertidos[e_numero] = _serial(uniques[e_numero].astype(np.float64)).to_numpy()
+
+    # NaN (código -1) aponta para o NaT/False extra no fim dos vetores
+    por_valor = np.append(convertidos.to_numpy(), np.datetime64("NaT", "ns"))
+    invalido = np.append(convertidos.isna().to_numpy() & ~vazios, False)
+    datas = pd.Series(por_valor[codes], index=s.index, dtype="datetime64[ns]")
+    return datas, pd.Series(invalido[codes], index=s.index)
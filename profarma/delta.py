@@ -0,0 +1,134 @@
+# profarma/delta.py (Ingestão incremental: diff por chave natural entre versões do relatório)
+
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Chaves naturais dos relatórios (a de Ocorrências se repete: ver key_hashes)
+CHAVE_OCORRENCIAS = ["Matricula", "Data", "Ocorrencia"]
+CHAVE_BANCO_HORAS = ["Matricula", "Referencia"]
+
+
+class Delta(NamedTuple):
+    """Diferença entre duas versões de um relatório (posições na ordem do bruto)."""
+    inseridas: np.ndarray   # linhas do relatório novo sem par no anterior
+    alteradas: np.ndarray   # linhas do relatório novo com a mesma chave e conteúdo diferente
+    removidas: np.ndarray   # linhas do relatório anterior (removidas ou na versão antiga das alteradas)
+    saidas: pd.DataFrame    # resultado derivado das linhas que saíram (anterior)
+    entradas: pd.DataFrame  # resultado derivado das linhas que entraram (novo)
+
+    @property
+    def reprocessadas(self) -> int:
+        return len(self.inseridas) + len(self.alteradas)
+
+
+def key_hashes(df: pd.DataFrame, chave: list) -> np.ndarray:
+    """
+    Hash da chave natural de cada linha. Chaves repetidas (ex.: duas ocorrências iguais
+    no mesmo dia) recebem o ordinal da repetição, então cada linha tem um hash único.
+    """
+    h = pd.util.hash_pandas_object(df[chave], index=False).to_numpy()
+    ordinal = pd.Series(h).groupby(h, sort=False).cumcount().to_numpy()
+    return pd.util.hash_pandas_object(pd.DataFrame({"h": h, "n": ordinal}), index=False).to_numpy()
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash do conteúdo inteiro de cada linha (detecta alteração com a mesma chave)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def match(chaves_ant: np.ndarray, linhas_ant: np.ndarray,
+          chaves: np.ndarray, linhas: np.ndarray) -> np.ndarray:
+    """
+    Para cada linha nova, a posição da linha anterior reaproveitável (mesma chave e
+    mesmo conteúdo) ou -1 quando ela precisa ser reprocessada.
+    """
+    origem = pd.Index(chaves_ant).get_indexer(chaves)
+    comuns = origem >= 0
+    mudou = np.zeros(len(chaves), dtype=bool)
+    mudou[comuns] = linhas[comuns] != linhas_ant[origem[comuns]]
+    origem[mudou] = -1
+    return origem
+
+
+class Incremental:
+    """
+    Estado de um relatório entre cargas: chaves e hashes do último bruto e o resultado de
+    `derivar` (colunas calculadas linha a linha, sem reordenar) na ordem do bruto.
+    A cada versão nova só as linhas inseridas ou alteradas passam por `derivar`; as demais
+    são copiadas do resultado anterior. Mudou o layout (colunas/tipos) -> reprocessa tudo.
+    """
+
+    def __init__(self, chave: list, derivar):
+        self.chave = chave
+        self.derivar = derivar
+        self._lock = threading.Lock()
+        self._conteudo = None   # chave de conteúdo (cache.content_key) do último bruto
+        self._tipos = None
+        self._chaves = None
+        self._linhas = None
+        self._derivado = None
+
+    def apply(self, bruto: pd.DataFrame, conteudo: str = None) -> tuple:
+        """
+        Devolve (derivado, delta) para a nova versão `bruto` e guarda o estado.
+        `delta` é None quando não houve base para comparar (primeira carga ou layout novo).
+        O `derivado` devolvido é compartilhado com o estado: não altere no lugar.
+        """
+        with self._lock:
+            anterior = self._derivado
+            if anterior is not None and conteudo is not None and conteudo == self._conteudo:
+                # mesmo arquivo (ex.: 304 do download): nada a diferenciar
+                vazio = np.empty(0, dtype=np.intp)
+                return anterior, Delta(vazio, vazio, vazio, anterior.iloc[:0], anterior.iloc[:0])
+
+            tipos = bruto.dtypes
+            if not all(c in bruto.columns for c in self.chave):
+                # sem a chave natural não há como casar linhas: processamento completo, sem estado
+                self._derivado = None
+                return self.derivar(bruto), None
+
+            chaves = key_hashes(bruto, self.chave)
+            linhas = row_hashes(bruto)
+            comparavel = anterior is not None and self._tipos.equals(tipos)
+
+            if not comparavel:
+                derivado, delta = self.derivar(bruto), None
+            else:
+                origem = match(self._chaves, self._linhas, chaves, linhas)
+                reaproveitadas = np.flatnonzero(origem >= 0)
+                reprocessar = np.flatnonzero(origem < 0)
+
+                presentes = np.zeros(len(anterior), dtype=bool)
+                presentes[origem[reaproveitadas]] = True
+                removidas = np.flatnonzero(~presentes)
+                novas = pd.Index(self._chaves).get_indexer(chaves[reprocessar]) < 0
+
+                entradas = self.derivar(bruto.iloc[reprocessar].reset_index(drop=True))
+                if np.array_equal(origem, np.arange(len(anterior))):
+                    derivado = anterior  # mesmas linhas na mesma ordem
+                else:
+                    # reaproveitadas + reprocessadas, devolvidas à ordem do bruto novo
+                    partes = pd.concat([anterior.take(origem[reaproveitadas]), entradas], ignore_index=True)
+                    ordem = np.argsort(np.concatenate([reaproveitadas, reprocessar]), kind="stable")
+                    derivado = partes.take(ordem).reset_index(drop=True)
+                delta = Delta(
+                    inseridas=reprocessar[novas],
+                    alteradas=reprocessar[~novas],
+                    removidas=removidas,
+                    saidas=anterior.take(removidas).reset_index(drop=True),
+                    entradas=entradas,
+                )
+
+            self._conteudo = conteudo
+            self._tipos = tipos
+            self._chaves = chaves
+            self._linhas = linhas
+            self._derivado = derivado
+            return derivado, delta
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conteudo = self._tipos = self._chaves = self._linhas = self._derivado = None
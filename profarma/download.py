@@ -0,0 +1,145 @@
+# profarma/download.py (Download dos relatórios com revalidação condicional ETag/Last-Modified)
+
+import hashlib
+import json
+import os
+import tempfile
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+from profarma import cache
+
+# Corpo + validadores da última resposta 200 de cada URL
+HTTP_CACHE_DIR = os.path.join(cache.CACHE_DIR, "http")
+
+# Retentativas de falhas transitórias (sobrescrevíveis por variável de ambiente)
+HTTP_RETRIES = int(os.environ.get("PROFARMA_HTTP_RETRIES", "3"))
+HTTP_BACKOFF_SEGUNDOS = 0.5    # espera 0,5 s, 1 s, 2 s... entre tentativas
+HTTP_BACKOFF_MAX_SEGUNDOS = 8  # teto do backoff; Retry-After maior encerra as tentativas (a carga não pode travar a thread)
+HTTP_STATUS_RETRY = (429, 500, 502, 503, 504)
+
+
+class _Retry(Retry):
+    """
+    Retry do urllib3 com teto para o backoff exponencial. Retry-After acima do teto não é
+    encurtado: a retentativa para ali e o 429/503 sobe (bater antes no GitHub não adianta).
+    """
+
+    def get_backoff_time(self) -> float:
+        return min(super().get_backoff_time(), HTTP_BACKOFF_MAX_SEGUNDOS)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and self.respect_retry_after_header:
+            espera = self.get_retry_after(response)
+            if espera is not None and espera > HTTP_BACKOFF_MAX_SEGUNDOS:
+                # com raise_on_status=False a própria resposta volta para raise_for_status
+                raise MaxRetryError(_pool, url, ResponseError(f"Retry-After de {espera:.0f}s acima do limite"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def _session() -> requests.Session:
+    """
+    Sessão do processo: conexões keep-alive reaproveitadas entre downloads (sem novo
+    handshake TCP+TLS a cada carga) e retentativa com backoff exponencial em 5xx/429,
+    respeitando o Retry-After (limite de taxa do GitHub Raw).
+    """
+    retry = _Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF_SEGUNDOS,
+        status_forcelist=HTTP_STATUS_RETRY,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # esgotadas as tentativas, a última resposta segue para raise_for_status
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+    sessao = requests.Session()
+    sessao.mount("https://", adapter)
+    sessao.mount("http://", adapter)
+    return sessao
+
+
+# Compartilhada pelas threads de carga (um GET por vez em cada conexão do pool)
+_sessao = _session()
+
+
+def _paths(url: str) -> tuple:
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    base = os.path.join(HTTP_CACHE_DIR, key)
+    return base + ".body", base + ".json"
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=HTTP_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _load(url: str) -> tuple:
+    """Devolve (validadores, corpo) guardados para a URL, ou ({}, None)."""
+    body_path, meta_path = _paths(url)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        with open(body_path, "rb") as fh:
+            body = fh.read()
+    except (OSError, ValueError):
+        return {}, None
+    if meta.get("url") != url:
+        return {}, None
+    return meta, body
+
+
+def _store(url: str, resp: requests.Response, body: bytes) -> None:
+    meta = {
+        "url": url,
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+    if not (meta["etag"] or meta["last_modified"]):
+        return  # sem validadores não há como revalidar depois
+    try:
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        body_path, meta_path = _paths(url)
+        # corpo antes dos metadados: um .json nunca aponta para corpo parcial
+        _write_atomic(body_path, body)
+        _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+    except OSError:
+        pass
+
+
+def fetch(url: str, headers: dict = None, timeout: float = 30, validate=None) -> bytes:
+    """
+    GET condicional: envia If-None-Match/If-Modified-Since com os validadores da última
+    resposta e, em 304, devolve os bytes guardados localmente sem baixar de novo.
+    - validate(raw) é chamado antes de guardar; se levantar erro, nada é gravado.
+    - Falhas transitórias (conexão, 5xx, 429) são repetidas pela sessão antes de virar erro.
+    """
+    meta, cached_body = _load(url)
+    req_headers = dict(headers or {})
+    if cached_body is not None:
+        if meta.get("etag"):
+            req_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            req_headers["If-Modified-Since"] = meta["last_modified"]
+
+    resp = _sessao.get(url, headers=req_headers, timeout=timeout)
+    if resp.status_code == 304 and cached_body is not None:
+        return cached_body
+    resp.raise_for_status()
+
+    raw = resp.content
+    if validate is not None:
+        validate(raw)
+    _store(url, resp, raw)
+    return raw
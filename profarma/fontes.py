@@ -0,0 +1,151 @@
+# profarma/fontes.py (Origens dos relatórios: HTTP, arquivo local, pasta monitorada e upload)
+#
+# Seleção por configuração (variáveis de ambiente):
+#   PROFARMA_FONTE=http     PROFARMA_FONTE_ORIGEM=https://.../Dashboard/   (padrão: GitHub Raw)
+#   PROFARMA_FONTE=arquivo  PROFARMA_FONTE_ORIGEM=/mnt/rh                  (nomes exatos dos relatórios)
+#   PROFARMA_FONTE=pasta    PROFARMA_FONTE_ORIGEM=/mnt/rh/entrada          (arquivo mais recente de cada relatório)
+
+import fnmatch
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from profarma import download
+
+
+class Fonte(ABC):
+    """Interface: `read(nome)` devolve os bytes do relatório `nome` (ex.: 'Relatorio_OcorrenciasNoPonto.xlsx')."""
+
+    @abstractmethod
+    def read(self, nome: str) -> bytes:
+        """Bytes atuais do relatório; erro de acesso sobe como exceção (vira aviso no Dataset)."""
+
+    def location(self, nome: str) -> str:
+        """Onde o relatório é lido agora (URL ou caminho)."""
+        return nome
+
+    def describe(self, nome: str) -> str:
+        """Origem para mensagens de erro (não toca rede nem disco)."""
+        return self.location(nome)
+
+
+class HttpFonte(Fonte):
+    """URL base + nome do arquivo, via download condicional (ETag) com retentativas."""
+
+    def __init__(self, base: str, headers: dict = None, timeout: float = 30, validate=None):
+        self.base = base if base.endswith("/") else base + "/"
+        self.headers = headers
+        self.timeout = timeout
+        self.validate = validate
+
+    def location(self, nome: str) -> str:
+        return self.base + nome
+
+    def read(self, nome: str) -> bytes:
+        return download.fetch(self.location(nome), headers=self.headers, timeout=self.timeout, validate=self.validate)
+
+
+class ArquivoFonte(Fonte):
+    """
+    Arquivos locais (ex.: montagem de rede rápida).
+    Guarda em memória só o arquivo atual de cada relatório e o relê apenas quando
+    caminho, mtime ou tamanho mudam.
+    """
+
+    def __init__(self, base: str, validate=None):
+        self.base = base
+        self.validate = validate
+        self._lock = threading.Lock()
+        self._lidos = {}  # nome do relatório -> (caminho, (mtime_ns, tamanho), bytes)
+
+    def location(self, nome: str) -> str:
+        return os.path.join(self.base, nome)
+
+    def read(self, nome: str) -> bytes:
+        caminho = self.location(nome)
+        info = os.stat(caminho)
+        assinatura = (info.st_mtime_ns, info.st_size)
+        with self._lock:
+            lido = self._lidos.get(nome)
+        if lido is not None and lido[:2] == (caminho, assinatura):
+            return lido[2]
+
+        # leitura simples, sem mmap: um mapeamento aberto trava o arquivo no Windows
+        # (o RH não conseguiria sobrescrever a exportação) e o parser precisa dos bytes
+        with open(caminho, "rb") as fh:
+            raw = fh.read()
+        if self.validate is not None:
+            self.validate(raw)
+        with self._lock:
+            # substitui a entrada do relatório: o arquivo anterior sai da memória
+            self._lidos[nome] = (caminho, assinatura, raw)
+        return raw
+
+
+class PastaFonte(ArquivoFonte):
+    """
+    Pasta monitorada: para cada relatório usa o arquivo mais recente cujo nome começa pelo
+    nome do relatório (ex.: 'Relatorio_OcorrenciasNoPonto (3).xlsx', '..._2025-11.xlsx').
+    A pasta é listada a cada carga; o conteúdo só é relido quando o arquivo escolhido muda.
+    """
+
+    def location(self, nome: str) -> str:
+        raiz, ext = os.path.splitext(nome)
+        padrao = f"{raiz}*{ext}"
+        candidatos = []
+        for entrada in os.scandir(self.base):
+            # '~$...' são travas do Excel com o arquivo aberto
+            if entrada.is_file() and fnmatch.fnmatch(entrada.name, padrao) and not entrada.name.startswith("~$"):
+                candidatos.append((entrada.stat().st_mtime_ns, entrada.name))
+        if not candidatos:
+            raise FileNotFoundError(f"Nenhum arquivo '{padrao}' em '{self.base}'.")
+        return os.path.join(self.base, max(candidatos)[1])
+
+    def describe(self, nome: str) -> str:
+        raiz, ext = os.path.splitext(nome)
+        return os.path.join(self.base, f"{raiz}*{ext}")
+
+
+class UploadFonte(Fonte):
+    """Bytes recebidos em memória (ex.: st.file_uploader ou testes), por nome do relatório."""
+
+    def __init__(self, arquivos: dict = None, validate=None):
+        self.validate = validate
+        self._lock = threading.Lock()
+        self._arquivos = dict(arquivos or {})
+
+    def put(self, nome: str, raw: bytes) -> None:
+        if self.validate is not None:
+            self.validate(raw)
+        with self._lock:
+            self._arquivos[nome] = bytes(raw)
+
+    def location(self, nome: str) -> str:
+        return f"upload:{nome}"
+
+    def read(self, nome: str) -> bytes:
+        with self._lock:
+            raw = self._arquivos.get(nome)
+        if raw is None:
+            raise FileNotFoundError(f"Relatório '{nome}' ainda não enviado.")
+        return raw
+
+
+TIPOS = {"http": HttpFonte, "arquivo": ArquivoFonte, "pasta": PastaFonte}
+
+
+def from_config(tipo: str = None, origem: str = None, padrao: str = None, **opcoes) -> Fonte:
+    """
+    Fonte escolhida por PROFARMA_FONTE / PROFARMA_FONTE_ORIGEM (ou pelos argumentos).
+    Sem configuração: HTTP na URL `padrao`. `opcoes` seguem para o construtor (headers, validate...).
+    """
+    tipo = (tipo or os.environ.get("PROFARMA_FONTE") or "http").strip().lower()
+    origem = origem or os.environ.get("PROFARMA_FONTE_ORIGEM") or (padrao if tipo == "http" else None)
+    if tipo not in TIPOS:
+        raise ValueError(f"PROFARMA_FONTE inválida: '{tipo}' (use {', '.join(sorted(TIPOS))}).")
+    if not origem:
+        raise ValueError(f"PROFARMA_FONTE_ORIGEM não definida para a fonte '{tipo}'.")
+    if tipo != "http":
+        opcoes.pop("headers", None)
+        opcoes.pop("timeout", None)
+    return TIPOS[tipo](origem, **opcoes)
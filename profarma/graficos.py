@@ -0,0 +1,108 @@
+# profarma/graficos.py (Gráficos de ranking: barras enxutas em graph_objects + cache das figuras)
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from profarma.memo import LRUMemo
+
+# Dicts de figuras já montadas; um ranking tem poucos KB, então o limite é por quantidade
+_figuras = LRUMemo(max_entries=256, max_bytes=32 * 1024 * 1024)
+
+
+def _lista(valores) -> list:
+    """Array -> lista Python (o JSON final fica só com os valores, sem metadados do pandas)."""
+    return np.asarray(valores).tolist()
+
+
+def stacked_bars(categorias, series: dict, cores: list, text=None, height: int = 400,
+                 titulo_x: str = None, titulo_y: str = None, titulo_legenda: str = None):
+    """
+    Barras horizontais empilhadas, um trace por medida ({nome_na_legenda: valores}),
+    direto dos arrays já agregados (sem o formato longo do plotly.express).
+    """
+    y = _lista(categorias)
+    rotulos = None if text is None else [str(t) for t in _lista(text)]
+    fig = go.Figure(layout=dict(
+        template="plotly_white",
+        barmode="relative",
+        height=height,
+        xaxis=dict(title=dict(text=titulo_x)),
+        yaxis=dict(title=dict(text=titulo_y)),
+        legend=dict(title=dict(text=titulo_legenda)),
+        uniformtext=dict(minsize=8, mode="hide"),
+    ))
+    for (nome, valores), cor in zip(series.items(), cores):
+        fig.add_trace(go.Bar(
+            y=y, x=_lista(valores), name=nome, orientation="h",
+            marker=dict(color=cor), text=rotulos,
+            textposition="outside" if rotulos is not None else None, cliponaxis=False,
+            hovertemplate=f"{nome}: %{{x}}<extra>%{{y}}</extra>",
+        ))
+    return fig
+
+
+def ranking_bars(categorias, valores, text=None, height: int = 400, titulo: str = None,
+                 titulo_x: str = None, titulo_y: str = None, cor: str = None,
+                 escala: list = None, rotulo_cor: str = None):
+    """
+    Ranking horizontal (um trace) na ordem recebida: cor fixa (`cor`) ou escala contínua
+    pelo próprio valor (`escala`, com barra de cores `rotulo_cor`).
+    """
+    y = _lista(categorias)
+    x = _lista(valores)
+    if escala is not None:
+        marker = dict(color=x, coloraxis="coloraxis")
+    else:
+        marker = dict(color=cor)
+    fig = go.Figure(
+        go.Bar(
+            y=y, x=x, orientation="h", marker=marker,
+            text=None if text is None else [str(t) for t in _lista(text)],
+            textposition="outside", cliponaxis=False,
+            hovertemplate="%{y}: %{text}<extra></extra>" if text is not None else "%{y}: %{x}<extra></extra>",
+        ),
+        layout=dict(
+            template="plotly_white",
+            height=height,
+            title=dict(text=titulo),
+            xaxis=dict(title=dict(text=titulo_x)),
+            yaxis=dict(title=dict(text=titulo_y), categoryorder="array", categoryarray=y[::-1]),
+            uniformtext=dict(minsize=8, mode="hide"),
+            showlegend=False,
+        ),
+    )
+    if escala is not None:
+        fig.update_layout(coloraxis=dict(colorscale=escala, colorbar=dict(title=dict(text=rotulo_cor))))
+    return fig
+
+
+def fingerprint(df: pd.DataFrame, params: dict) -> str:
+    """Hash do conteúdo do frame (valores, índice, colunas, tipos) + parâmetros de layout."""
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode("utf-8"))
+    h.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def cached_figure(nome: str, df: pd.DataFrame, construir, **params):
+    """
+    Figura de `construir(df, **params)` via cache: mesmo frame + mesmos parâmetros
+    -> reaproveita o dict da figura (to_plotly_json), sem montar nem validar traces de novo.
+    O dict guardado não é alterado: o st.plotly_chart recebe um go.Figure sem validação
+    por cima dele (um dict cru seria revalidado inteiro pelo próprio Streamlit).
+    """
+    chave = (nome, fingerprint(df, params))
+    spec = _figuras.get(chave)
+    if spec is None:
+        spec = construir(df, **params).to_plotly_json()
+        _figuras.put(chave, spec)
+    return go.Figure(spec, _validate=False)
+
+
+def clear() -> None:
+    _figuras.clear()
@@ -0,0 +1,283 @@
+# profarma/historico.py (Histórico multi-período: Parquet particionado por referência AAAA-MM)
+#
+# Ingestão (uma vez por exportação mensal; o Banco de Horas do mesmo período delimita as Ocorrências):
+#   python -m profarma.historico ingerir Relatorio_ContaCorrenteBancoDeHorasResumo.xlsx Relatorio_OcorrenciasNoPonto.xlsx
+#   python -m profarma.historico listar
+#
+# Layout: <HISTORICO_DIR>/<tabela>/referencia=AAAA-MM/dados.parquet
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from profarma import dados, datas
+
+# Diretório persistente (não é cache: não há evicção); sobrescrevível por variável de ambiente
+HISTORICO_DIR = os.environ.get(
+    "PROFARMA_HISTORICO_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "historico"),
+)
+
+OCORRENCIAS = "ocorrencias"
+BANCO_HORAS = "banco_horas"
+TABELAS = {OCORRENCIAS: dados.SHEET_OCORRENCIAS, BANCO_HORAS: dados.SHEET_BANCO_HORAS}
+
+_PREFIXO = "referencia="
+_ARQUIVO = "dados.parquet"
+
+
+def _referencia_bh(valores: pd.Series) -> pd.Series:
+    """'MM/AAAA' (coluna Referencia do Banco de Horas) -> 'AAAA-MM'; fora do padrão vira NaN."""
+    partes = valores.astype(str).str.extract(r"^\s*(\d{1,2})\s*/\s*(\d{4})\s*$")
+    mes = pd.to_numeric(partes[0], errors="coerce")
+    ok = partes[1].notna() & mes.between(1, 12)
+    ref = partes[1] + "-" + mes.fillna(0).astype(int).astype(str).str.zfill(2)
+    return ref.where(ok)
+
+
+def detect_table(df: pd.DataFrame) -> str:
+    """Tipo do relatório pelas colunas: Banco de Horas tem Referencia, Ocorrências tem Data+Ocorrencia."""
+    if "Referencia" in df.columns and "SaldoFinal" in df.columns:
+        return BANCO_HORAS
+    if "Data" in df.columns and "Ocorrencia" in df.columns:
+        return OCORRENCIAS
+    raise ValueError("Relatório não reconhecido (esperado Ocorrências no Ponto ou Banco de Horas Resumo).")
+
+
+def _dir(tabela: str, referencia: str = None, base: str = None) -> str:
+    raiz = os.path.join(base or HISTORICO_DIR, tabela)
+    return raiz if referencia is None else os.path.join(raiz, _PREFIXO + referencia)
+
+
+def partitions(tabela: str, base: str = None) -> list:
+    """Referências (AAAA-MM) já gravadas para a tabela, em ordem."""
+    try:
+        nomes = os.listdir(_dir(tabela, base=base))
+    except OSError:
+        return []
+    refs = [n[len(_PREFIXO):] for n in nomes if n.startswith(_PREFIXO)]
+    return sorted(r for r in refs if os.path.exists(os.path.join(_dir(tabela, r, base), _ARQUIVO)))
+
+
+def _read_partition(tabela: str, referencia: str, base: str = None) -> pd.DataFrame:
+    df = pd.read_parquet(os.path.join(_dir(tabela, referencia, base), _ARQUIVO))
+    # Parquet devolve None em texto ausente; mantém NaN como na leitura do XLSX
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def _write_partition(tabela: str, referencia: str, df: pd.DataFrame, base: str = None) -> None:
+    """Grava a partição inteira de forma atômica (tmp + rename no mesmo diretório)."""
+    destino = _dir(tabela, referencia, base)
+    os.makedirs(destino, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=destino, suffix=".tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(destino, _ARQUIVO))
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read(tabela: str, inicio: str = None, fim: str = None, base: str = None) -> pd.DataFrame:
+    """
+    Linhas brutas das referências entre `inicio` e `fim` (AAAA-MM, inclusivos; None = aberto).
+    Só as partições do intervalo são abertas.
+    """
+    refs = [r for r in partitions(tabela, base)
+            if (inicio is None or r >= inicio) and (fim is None or r <= fim)]
+    if not refs:
+        return pd.DataFrame()
+    return pd.concat([_read_partition(tabela, r, base) for r in refs], ignore_index=True)
+
+
+def _remove_partition(tabela: str, referencia: str, base: str = None) -> None:
+    """Apaga a partição (mês que ficou sem nenhuma linha depois de uma reexportação)."""
+    destino = _dir(tabela, referencia, base)
+    try:
+        os.remove(os.path.join(destino, _ARQUIVO))
+        os.rmdir(destino)
+    except OSError:
+        pass
+
+
+def bh_periods(base: str = None) -> list:
+    """Períodos (PeriodoInicial, PeriodoFinal) das referências de Banco de Horas já gravadas."""
+    periodos = set()
+    for referencia in partitions(BANCO_HORAS, base):
+        caminho = os.path.join(_dir(BANCO_HORAS, referencia, base), _ARQUIVO)
+        try:
+            df = pd.read_parquet(caminho, columns=["PeriodoInicial", "PeriodoFinal"])
+        except (KeyError, ValueError, OSError):
+            continue  # exportação sem as colunas de período
+        inicio, _ = datas.parse_dates(df["PeriodoInicial"])
+        fim, _ = datas.parse_dates(df["PeriodoFinal"])
+        ok = inicio.notna() & fim.notna()
+        periodos.update(zip(inicio[ok].dt.normalize(), fim[ok].dt.normalize()))
+    return sorted(periodos)
+
+
+def export_period(datas_validas: pd.Series, periodo: tuple = None, periodos_bh: list = ()) -> tuple:
+    """
+    Período (inicio, fim) coberto por uma exportação de Ocorrências, em datas inclusivas.
+    - Informado (`periodo`): vale ele, ampliado se a exportação trouxer datas fora dele.
+    - Senão, o período de Banco de Horas (`periodos_bh`, ex.: 11 a 10) que contém todas as datas.
+    - Senão, da menor à maior Data: nada fora das datas da própria exportação é substituído,
+      então a exportação do período anterior (ex.: 11/07 a 10/08 antes de 11/08 a 10/09) fica.
+    """
+    menor, maior = datas_validas.min().normalize(), datas_validas.max().normalize()
+    if periodo is not None:
+        inicio, fim = (pd.Timestamp(p).normalize() for p in periodo)
+        return min(inicio, menor), max(fim, maior)
+    for inicio, fim in periodos_bh:
+        if inicio <= menor and maior <= fim:
+            return inicio, fim
+    return menor, maior
+
+
+def ingest(df: pd.DataFrame, tabela: str = None, base: str = None, periodo: tuple = None) -> dict:
+    """
+    Grava uma exportação no histórico e devolve {referencia: linhas_gravadas}.
+    - Banco de Horas: cada Referencia é um retrato completo -> substitui a partição.
+    - Ocorrências: partição = mês da Data. Dentro do período coberto pela exportação
+      (ver export_period; sem `periodo`, o do Banco de Horas já gravado ou a menor/maior Data)
+      as linhas antigas são substituídas, inclusive nos dias que deixaram de ter ocorrências;
+      fora dele ficam como estavam.
+    Linhas sem referência reconhecível são ignoradas e contadas em 'sem_referencia'.
+    """
+    tabela = tabela or detect_table(df)
+    if tabela == BANCO_HORAS:
+        refs = _referencia_bh(df["Referencia"])
+    elif tabela == OCORRENCIAS:
+        datas_novas, _ = datas.parse_dates(df["Data"])
+        refs = datas_novas.dt.strftime("%Y-%m").where(datas_novas.notna())
+    else:
+        raise ValueError(f"Tabela desconhecida: '{tabela}'.")
+
+    resultado = {}
+    sem_referencia = int(refs.isna().sum())
+    grupos = {ref: novos.reset_index(drop=True) for ref, novos in df.groupby(refs, sort=True)}
+
+    if tabela == OCORRENCIAS and grupos:
+        periodos_bh = bh_periods(base) if periodo is None else ()
+        inicio, fim = export_period(datas_novas[datas_novas.notna()], periodo, periodos_bh)
+        cobertos = pd.period_range(inicio, fim, freq="M").strftime("%Y-%m")
+        existentes = set(partitions(tabela, base))
+        for referencia in sorted(set(cobertos) | set(grupos)):
+            novos = grupos.get(referencia, df.iloc[:0])
+            if referencia in existentes:
+                antigos = _read_partition(tabela, referencia, base)
+                data_antiga, _ = datas.parse_dates(antigos["Data"])
+                fora = ~data_antiga.between(inicio, fim)
+                novos = pd.concat([antigos[fora.to_numpy()], novos], ignore_index=True)
+            if novos.empty:
+                _remove_partition(tabela, referencia, base)
+                if referencia in existentes:
+                    resultado[referencia] = 0
+                continue
+            _write_partition(tabela, referencia, novos, base)
+            resultado[referencia] = len(novos)
+    else:
+        for referencia, novos in grupos.items():
+            _write_partition(tabela, referencia, novos, base)
+            resultado[referencia] = len(novos)
+
+    if sem_referencia:
+        resultado["sem_referencia"] = sem_referencia
+    return resultado
+
+
+def read_file(caminho: str, tabela: str = None) -> tuple:
+    """Lê um XLSX exportado (mesma leitura do dashboard): (tabela, DataFrame, avisos)."""
+    with open(caminho, "rb") as fh:
+        raw = fh.read()
+    dados._check_xlsx_bytes(raw)
+    avisos = []
+    if tabela is None:
+        # a aba esperada indica o tipo; na dúvida, as colunas decidem
+        nomes = [dados._normalize(n) for n in dados.xlsx.sheet_names(raw)]
+        tabela = next((t for t, aba in TABELAS.items() if dados._normalize(aba) in nomes), None)
+    df, _ = dados.read_report(raw, TABELAS.get(tabela, dados.SHEET_OCORRENCIAS), origem=caminho, avisos=avisos)
+    return tabela or detect_table(df), df, avisos
+
+
+def ingest_file(caminho: str, tabela: str = None, base: str = None, periodo: tuple = None) -> tuple:
+    """Lê um XLSX exportado e grava no histórico: (tabela, resultado do ingest, avisos)."""
+    tabela, df, avisos = read_file(caminho, tabela)
+    return tabela, ingest(df, tabela, base, periodo), avisos
+
+
+def _data(texto: str) -> pd.Timestamp:
+    try:
+        return pd.to_datetime(texto, format=datas.FORMATO_DATA)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida '{texto}' (use dd/mm/aaaa)")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m profarma.historico",
+        description="Histórico particionado por referência dos relatórios Profarma.",
+    )
+    parser.add_argument("--dir", default=None, help=f"diretório do histórico (padrão: {HISTORICO_DIR})")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_ing = sub.add_parser("ingerir", help="grava exportações XLSX no histórico")
+    p_ing.add_argument("arquivos", nargs="+")
+    p_ing.add_argument("--tabela", choices=sorted(TABELAS), default=None,
+                       help="força o tipo do relatório (padrão: detectar)")
+    p_ing.add_argument("--inicio", type=_data, default=None,
+                       help="início do período exportado, dd/mm/aaaa (Ocorrências; padrão: PeriodoInicial "
+                            "do Banco de Horas que contém as datas, senão a menor Data)")
+    p_ing.add_argument("--fim", type=_data, default=None,
+                       help="fim do período exportado, dd/mm/aaaa (Ocorrências; padrão: PeriodoFinal "
+                            "do Banco de Horas que contém as datas, senão a maior Data)")
+
+    sub.add_parser("listar", help="mostra as referências gravadas por tabela")
+
+    args = parser.parse_args(argv)
+    if args.comando == "listar":
+        for tabela in sorted(TABELAS):
+            refs = partitions(tabela, args.dir)
+            print(f"{tabela}: {', '.join(refs) if refs else '(vazio)'}")
+        return 0
+
+    periodo = None
+    if args.inicio is not None or args.fim is not None:
+        if args.inicio is None or args.fim is None:
+            parser.error("--inicio e --fim devem ser informados juntos")
+        periodo = (args.inicio, args.fim)
+
+    falhas = 0
+    lidos = []
+    for caminho in args.arquivos:
+        try:
+            lidos.append((caminho, *read_file(caminho, args.tabela)))
+        except Exception as e:
+            print(f"ERRO {caminho}: {e}", file=sys.stderr)
+            falhas += 1
+
+    # Banco de Horas primeiro: o período dele (PeriodoInicial/PeriodoFinal) delimita as Ocorrências
+    lidos.sort(key=lambda item: item[1] != BANCO_HORAS)
+    for caminho, tabela, df, avisos in lidos:
+        for aviso in avisos:
+            print(f"AVISO {caminho}: {aviso}", file=sys.stderr)
+        try:
+            resultado = ingest(df, tabela, args.dir, periodo)
+        except Exception as e:
+            print(f"ERRO {caminho}: {e}", file=sys.stderr)
+            falhas += 1
+            continue
+        resumo = ", ".join(f"{ref}={n}" for ref, n in resultado.items())
+        print(f"{caminho} -> {tabela}: {resumo}")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# profarma/horas.py (Conversão vetorizada de durações HH:MM <-> minutos inteiros)
+
+import numpy as np
+import pandas as pd
+
+# [-]H+:MM[:SS...] — mesmas regras do antigo hhmm_to_min:
+# sinal só no início, horas sem limite de dígitos, segundos (e o resto) ignorados
+_HHMM_RE = r"^\s*(-?)\s*(\d+)\s*:\s*(\d+)\s*(?::|$)"
+
+
+def hhmm_series_to_min(values) -> pd.Series:
+    """
+    Converte uma coluna inteira de '[-]H+:MM[:SS]' em minutos inteiros (int64).
+    - Vazio, NaN e células malformadas viram 0 (como hhmm_to_min fazia célula a célula).
+    - O regex roda só sobre os valores distintos: relatórios repetem muito '00:00'.
+    """
+    s = pd.Series(values) if not isinstance(values, pd.Series) else values
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    if len(uniques) == 0:
+        return pd.Series(np.zeros(len(s), dtype=np.int64), index=s.index)
+
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(_HHMM_RE)
+    ok = parts[1].notna().to_numpy()
+    horas = pd.to_numeric(parts[1], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    minutos = pd.to_numeric(parts[2], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    sinal = np.where(parts[0].to_numpy() == "-", -1, 1)
+    por_valor = np.where(ok, sinal * (horas * 60 + minutos), 0)
+
+    # NaN (código -1) aponta para o 0 extra no fim do vetor
+    por_valor = np.append(por_valor, 0)
+    return pd.Series(por_valor[codes], index=s.index, dtype=np.int64)
+
+
+def min_to_hhmm(total_min: int) -> str:
+    """Converte minutos inteiros em 'HH:MM' com sinal (valor único, ex.: KPIs)."""
+    if total_min == 0 or pd.isna(total_min):
+        return "00:00"
+    neg = total_min < 0
+    a = abs(int(total_min))
+    h, m = divmod(a, 60)
+    sign = "-" if neg else ""
+    return f"{sign}{h:02d}:{m:02d}"
+
+
+def min_series_to_hhmm(values) -> pd.Series:
+    """
+    Formata um array inteiro de minutos como 'HH:MM' com sinal, de uma vez só.
+    - Aritmética inteira (divmod por 60): sem passar por horas decimais, sem o ajuste 'minutos == 60'.
+    - Só os valores distintos são formatados; o resultado é espalhado pelo índice inverso.
+    """
+    s = pd.Series(values) if not isinstance(values, pd.Series) else values
+    numeros = pd.to_numeric(s, errors="coerce")
+    if pd.api.types.is_integer_dtype(numeros):
+        arr = numeros.fillna(0).to_numpy(dtype=np.int64)  # minutos inteiros: nenhuma passagem por float
+    else:
+        arr = numeros.fillna(0).astype(np.int64).to_numpy()  # um único cast (trunca em direção a zero)
+    uniques, inverse = np.unique(arr, return_inverse=True)
+
+    h, m = np.divmod(np.abs(uniques), 60)
+    sinais = np.where(uniques < 0, "-", "")
+    textos = np.array(
+        [f"{sg}{hh:02d}:{mm:02d}" for sg, hh, mm in zip(sinais.tolist(), h.tolist(), m.tolist())],
+        dtype=object,
+    )
+    return pd.Series(textos[inverse], index=s.index, dtype=object)
+
+
+def add_minute_columns(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """Cria '<coluna>_Min' para cada coluna de duração presente (Credito, Debito, QtdDeHoras...)."""
+    for col in columns:
+        if col in df.columns:
+            df[f"{col}_Min"] = hhmm_series_to_min(df[col])
+    return df
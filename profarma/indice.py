@@ -0,0 +1,117 @@
+# profarma/indice.py (Índice de filtros: um bitmap de linhas por Estabelecimento e por Departamento)
+
+import numpy as np
+import pandas as pd
+
+DIMENSOES = ["Estabelecimento", "Departamento"]
+
+
+def _packed_bitmaps(codes: np.ndarray, n_valores: int, n_linhas: int) -> np.ndarray:
+    """
+    Bitmaps já empacotados (mesmo layout de np.packbits, bit mais significativo primeiro):
+    cada linha liga um bit no byte linha // 8 do seu valor, sem montar a matriz booleana
+    n_valores x n_linhas (centenas de MB em relatórios grandes).
+    """
+    bitmaps = np.zeros((n_valores, (n_linhas + 7) // 8), dtype=np.uint8)
+    linhas = np.flatnonzero(codes >= 0)  # NaN (-1) não pertence a nenhum valor
+    bits = np.left_shift(1, 7 - (linhas & 7)).astype(np.uint8)
+    np.bitwise_or.at(bitmaps, (codes[linhas], linhas >> 3), bits)
+    return bitmaps
+
+
+class FilterIndex:
+    """
+    Montado uma vez por carga. Para cada dimensão guarda um bitmap (np.packbits) por valor:
+    - seleção dentro da dimensão = OR dos bitmaps escolhidos;
+    - entre dimensões = AND;
+    - no fim, um único gather das linhas (df.take), sem frames intermediários.
+    Guarda também, por Estabelecimento, o conjunto de Departamentos (filtro dependente).
+    """
+
+    def __init__(self, df: pd.DataFrame, dimensoes: list = None):
+        self.n_linhas = len(df)
+        self._valores = {}   # dimensão -> pd.Index dos valores (posição = linha do bitmap)
+        self._bitmaps = {}   # dimensão -> matriz uint8 (n_valores x ceil(n_linhas/8))
+        codigos = {}
+        for dim in DIMENSOES if dimensoes is None else dimensoes:
+            if dim not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[dim], sort=True)
+            valores = pd.Index(uniques)
+            self._valores[dim] = valores
+            self._bitmaps[dim] = _packed_bitmaps(codes, len(valores), self.n_linhas)
+            codigos[dim] = codes
+
+        # Estabelecimento -> frozenset de Departamentos, montado uma vez por carga
+        self._departamentos = {}
+        if "Estabelecimento" in codigos and "Departamento" in codigos:
+            pares = pd.DataFrame({
+                "e": codigos["Estabelecimento"], "d": codigos["Departamento"],
+            }).drop_duplicates()
+            pares = pares[(pares["e"] >= 0) & (pares["d"] >= 0)]
+            estabs = self._valores["Estabelecimento"]
+            deps = np.asarray(self._valores["Departamento"], dtype=object)
+            for e, grupo in pares.groupby("e")["d"]:
+                self._departamentos[estabs[e]] = frozenset(deps[grupo.to_numpy()])
+
+    def options(self, dim: str) -> list:
+        """Valores distintos (ordenados) de uma dimensão indexada: opções do multiselect."""
+        return list(self._valores[dim]) if dim in self._valores else []
+
+    def department_set(self, estabelecimentos=None) -> frozenset:
+        """Departamentos presentes nos estabelecimentos escolhidos (união); sem escolha = todos."""
+        if not estabelecimentos:
+            return frozenset(self.options("Departamento"))
+        vazio = frozenset()
+        return vazio.union(*(self._departamentos.get(e, vazio) for e in estabelecimentos))
+
+    def mask(self, **selecoes) -> np.ndarray | None:
+        """Máscara booleana das linhas na seleção (dimensão sem seleção = sem filtro); None se nada filtra."""
+        bits = None
+        for dim, selecionados in selecoes.items():
+            if not selecionados:
+                continue
+            if dim not in self._bitmaps:
+                raise KeyError(f"Dimensão '{dim}' não indexada.")
+            posicoes = self._valores[dim].get_indexer(list(selecionados))
+            posicoes = posicoes[posicoes >= 0]
+            if len(posicoes):
+                bits_dim = np.bitwise_or.reduce(self._bitmaps[dim][posicoes], axis=0)
+            else:
+                bits_dim = np.zeros(self._bitmaps[dim].shape[1], dtype=np.uint8)
+            bits = bits_dim if bits is None else (bits & bits_dim)
+        if bits is None:
+            return None
+        return np.unpackbits(bits, count=self.n_linhas).astype(bool)
+
+    def rows(self, **selecoes) -> np.ndarray | None:
+        """Posições (ordenadas) das linhas na seleção; None se nenhuma dimensão filtra."""
+        mask = self.mask(**selecoes)
+        return None if mask is None else np.flatnonzero(mask)
+
+    def select(self, df: pd.DataFrame, **selecoes) -> pd.DataFrame:
+        """Linhas de `df` (o mesmo frame indexado) na seleção, com um único gather."""
+        linhas = self.rows(**selecoes)
+        return df if linhas is None else df.take(linhas)
+
+
+def restrict(linhas: np.ndarray | None, mask: np.ndarray) -> np.ndarray:
+    """Posições onde `mask` (booleano, do frame completo) é True, dentro da seleção `linhas` (None = todas)."""
+    mask = np.asarray(mask, dtype=bool)
+    return np.flatnonzero(mask) if linhas is None else linhas[mask[linhas]]
+
+
+def ordered(ordem: np.ndarray, mask: np.ndarray | None) -> np.ndarray:
+    """Posições de `mask` na ordem da permutação `ordem` (pré-calculada na carga): sem sort por rerun."""
+    return ordem if mask is None else ordem[np.asarray(mask, dtype=bool)[ordem]]
+
+
+def project(df: pd.DataFrame, linhas: np.ndarray | None, colunas: dict) -> pd.DataFrame:
+    """
+    Projeção final para exibição: só as linhas selecionadas e só as colunas exibidas
+    ({coluna_origem: nome_exibido}). É a única alocação do caminho filtro -> tabela.
+    A ordem das linhas é a de `linhas`; o resultado já vem com índice 0..n-1.
+    """
+    if linhas is None:
+        linhas = np.arange(len(df))
+    return pd.DataFrame({novo: df[origem].array.take(linhas) for origem, novo in colunas.items()})
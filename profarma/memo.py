@@ -0,0 +1,97 @@
+# profarma/memo.py (Memo LRU dos resultados por filtro: KPIs, frames de gráfico e tabelas)
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Limites do memo (sobrescrevíveis por variável de ambiente, como o cache em disco)
+MEMO_MAX_ENTRIES = int(os.environ.get("PROFARMA_MEMO_MAX_ENTRIES", "128"))
+MEMO_MAX_BYTES = int(os.environ.get("PROFARMA_MEMO_MAX_MB", "64")) * 1024 * 1024
+
+
+def filter_key(escopo: str, versao: str, estabelecimentos=None, departamentos=None) -> tuple:
+    """Chave normalizada: a ordem de clique nos multiselects não muda o resultado."""
+    return (
+        escopo,
+        versao,
+        tuple(sorted(estabelecimentos or ())),
+        tuple(sorted(departamentos or ())),
+    )
+
+
+def estimate_bytes(valor) -> int:
+    """Tamanho aproximado em memória de um resultado (frames, arrays e contêineres)."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        uso = valor.memory_usage(deep=True)
+        return int(uso.sum()) if isinstance(valor, pd.DataFrame) else int(uso)
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(estimate_bytes(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(estimate_bytes(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+class LRUMemo:
+    """
+    Memo compartilhado entre sessões, limitado por número de entradas e por bytes.
+    Os valores guardados são devolvidos sem cópia: trate-os como somente leitura.
+    """
+
+    def __init__(self, max_entries: int = MEMO_MAX_ENTRIES, max_bytes: int = MEMO_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # chave -> (bytes, valor), mais recente no fim
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, valor) -> None:
+        tamanho = estimate_bytes(valor)
+        if tamanho > self.max_bytes:
+            return  # resultado maior que o memo inteiro: não vale a pena guardar
+        with self._lock:
+            antigo = self._entries.pop(key, None)
+            if antigo is not None:
+                self._bytes -= antigo[0]
+            self._entries[key] = (tamanho, valor)
+            self._bytes += tamanho
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (removido, _) = self._entries.popitem(last=False)
+                self._bytes -= removido
+
+    def get_or_compute(self, key, fn):
+        """Devolve o valor memoizado ou calcula com fn() e guarda."""
+        valor = self.get(key)
+        if valor is None:
+            valor = fn()
+            self.put(key, valor)
+        return valor
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# Instância do processo: as páginas de detalhe compartilham o mesmo orçamento
+resultados = LRUMemo()
@@ -0,0 +1,41 @@
+# profarma/tabelas.py (Tabelas de detalhe paginadas: só a página visível vai para o navegador)
+
+import math
+
+import pandas as pd
+import streamlit as st
+
+# 50 linhas x 35px já ocupam a altura máxima (500px) das tabelas de detalhe
+TAMANHO_PAGINA = 50
+
+
+def paginated_dataframe(df: pd.DataFrame, key: str, page_size: int = TAMANHO_PAGINA) -> None:
+    """
+    Mostra `df` em páginas de `page_size` linhas. A cada rerun só a página escolhida
+    é serializada (st.dataframe recebe a fatia), não a tabela filtrada inteira.
+    - `key` identifica o seletor de página no session_state (um por tabela).
+    - Se o filtro encolher a tabela, a página guardada é ajustada para a última válida.
+    """
+    total = len(df)
+    n_paginas = max(1, math.ceil(total / page_size))
+
+    if key in st.session_state and st.session_state[key] > n_paginas:
+        st.session_state[key] = n_paginas
+
+    pagina = 1
+    if n_paginas > 1:
+        pagina = int(st.number_input(
+            f'Página (de {n_paginas})', min_value=1, max_value=n_paginas,
+            value=1, step=1, key=key
+        ))
+
+    inicio = (pagina - 1) * page_size
+    janela = df.iloc[inicio:inicio + page_size]
+    st.dataframe(
+        janela,
+        use_container_width=True,
+        hide_index=True,
+        height=min(len(janela) * 35 + 40, 500)
+    )
+    if n_paginas > 1:
+        st.caption(f'Linhas {inicio + 1}–{inicio + len(janela)} de {total}')
@@ -0,0 +1,300 @@
+# profarma/xlsx.py (Leitor XLSX em streaming para os relatórios Profarma)
+
+import io
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+# Namespaces do SpreadsheetML / OPC
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_T_ROW = f"{{{NS_MAIN}}}row"
+_T_C = f"{{{NS_MAIN}}}c"
+_T_V = f"{{{NS_MAIN}}}v"
+_T_IS = f"{{{NS_MAIN}}}is"
+_T_T = f"{{{NS_MAIN}}}t"
+_T_SI = f"{{{NS_MAIN}}}si"
+_T_RPH = f"{{{NS_MAIN}}}rPh"
+_T_SHEET_DATA = f"{{{NS_MAIN}}}sheetData"
+
+# numFmtId embutidos do Excel que representam datas/horas
+_BUILTIN_DATE_FMTS = set(range(14, 23)) | set(range(45, 48))
+
+# Origem das datas seriais do Excel (sistema 1900, já com o bug do 29/02/1900)
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
+
+# --------------------------------------
+# Estrutura do pacote (workbook, rels, estilos)
+# --------------------------------------
+def _resolve_target(target: str, base_dir: str = "xl") -> str:
+    """Resolve o Target de um relationship para o caminho dentro do ZIP."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base_dir, target))
+
+
+def _workbook_parts(zf: zipfile.ZipFile) -> dict:
+    """Mapeia nome da aba -> caminho do XML da planilha, na ordem do workbook."""
+    rels = {}
+    rels_root = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels_root.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        rels[rel.get("Id")] = rel.get("Target", "")
+
+    sheets = {}
+    wb_root = ET.fromstring(zf.read("xl/workbook.xml"))
+    for sheet in wb_root.iter(f"{{{NS_MAIN}}}sheet"):
+        rid = sheet.get(f"{{{NS_REL}}}id")
+        if rid in rels:
+            sheets[sheet.get("name")] = _resolve_target(rels[rid])
+    return sheets
+
+
+def _shared_strings_part(zf: zipfile.ZipFile) -> str | None:
+    rels_root = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels_root.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        if rel.get("Type", "").endswith("/sharedStrings"):
+            return _resolve_target(rel.get("Target", ""))
+    return None
+
+
+def _styles_part(zf: zipfile.ZipFile) -> str | None:
+    rels_root = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels_root.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        if rel.get("Type", "").endswith("/styles"):
+            return _resolve_target(rel.get("Target", ""))
+    return None
+
+
+def _is_date_format(code: str) -> bool:
+    """Heurística do Excel: formato com d/m/y/h/s fora de aspas/colchetes é data."""
+    code = code.lower()
+    out = []
+    in_quote = in_bracket = False
+    for ch in code:
+        if ch == '"':
+            in_quote = not in_quote
+        elif ch == "[":
+            in_bracket = True
+        elif ch == "]":
+            in_bracket = False
+        elif not in_quote and not in_bracket:
+            out.append(ch)
+    cleaned = "".join(out)
+    return any(ch in cleaned for ch in "dmyhs")
+
+
+def _date_style_ids(zf: zipfile.ZipFile) -> set:
+    """Índices de cellXfs cujo formato numérico é de data."""
+    part = _styles_part(zf)
+    if part is None or part not in zf.namelist():
+        return set()
+    root = ET.fromstring(zf.read(part))
+
+    custom_dates = set()
+    for fmt in root.iter(f"{{{NS_MAIN}}}numFmt"):
+        try:
+            fmt_id = int(fmt.get("numFmtId"))
+        except (TypeError, ValueError):
+            continue
+        if _is_date_format(fmt.get("formatCode", "")):
+            custom_dates.add(fmt_id)
+
+    ids = set()
+    cell_xfs = root.find(f"{{{NS_MAIN}}}cellXfs")
+    if cell_xfs is None:
+        return ids
+    for idx, xf in enumerate(cell_xfs.iter(f"{{{NS_MAIN}}}xf")):
+        try:
+            fmt_id = int(xf.get("numFmtId", "0"))
+        except ValueError:
+            continue
+        if fmt_id in _BUILTIN_DATE_FMTS or fmt_id in custom_dates:
+            ids.add(str(idx))
+    return ids
+
+
+def _read_shared_strings(zf: zipfile.ZipFile) -> list:
+    """Lê sharedStrings.xml em streaming (suporta rich text <r><t>)."""
+    part = _shared_strings_part(zf)
+    if part is None or part not in zf.namelist():
+        return []
+    strings = []
+    with zf.open(part) as fh:
+        for _, elem in ET.iterparse(fh, events=("end",)):
+            if elem.tag != _T_SI:
+                continue
+            # Ignora o texto fonético (rPh), como o Excel faz
+            parts = []
+            for node in elem.iter():
+                if node.tag == _T_RPH:
+                    break
+                if node.tag == _T_T and node.text:
+                    parts.append(node.text)
+            strings.append("".join(parts))
+            elem.clear()
+    return strings
+
+
+def _col_index(ref: str) -> int:
+    """'A1' -> 0, 'AB12' -> 27."""
+    idx = 0
+    for ch in ref:
+        if "A" <= ch <= "Z":
+            idx = idx * 26 + (ord(ch) - 64)
+        else:
+            break
+    return idx - 1
+
+
+def _to_number(text: str):
+    # Mesmo critério do openpyxl: inteiro quando não há parte decimal/expoente
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+# --------------------------------------
+# API pública
+# --------------------------------------
+def sheet_names(raw: bytes) -> list:
+    """Nomes das abas do XLSX, na ordem do workbook."""
+    with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+        return list(_workbook_parts(zf))
+
+
+def read_sheet_columns(raw: bytes, sheet_name: str) -> tuple:
+    """
+    Percorre a aba em streaming (iterparse) e devolve (cabeçalho, colunas, colunas_data).
+    - Cada coluna é uma lista alinhada por linha (células ausentes viram NaN).
+    - Linhas em branco entre linhas preenchidas viram linhas de NaN (pelo índice `r` de
+      <row>), como no pd.read_excel; as em branco no fim da aba são descartadas.
+    - O cabeçalho é a primeira linha preenchida (o pd.read_excel usaria a linha 1 mesmo vazia).
+    - Nenhuma árvore da planilha é mantida em memória: cada <row> é descartada após lida.
+    """
+    with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+        parts = _workbook_parts(zf)
+        if sheet_name not in parts:
+            raise KeyError(f"Aba '{sheet_name}' não encontrada no arquivo.")
+        shared = _read_shared_strings(zf)
+        date_styles = _date_style_ids(zf)
+
+        header = None
+        columns = []       # uma lista por coluna
+        date_cols = set()  # índices de colunas com estilo de data
+        n_rows = 0
+        linha = 0          # número (1-based) da <row> atual
+        ultima = 0         # número da última linha preenchida
+        nan = np.nan
+
+        with zf.open(parts[sheet_name]) as fh:
+            sheet_data = None
+            for event, elem in ET.iterparse(fh, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == _T_SHEET_DATA:
+                        sheet_data = elem
+                    continue
+                if elem.tag != _T_ROW:
+                    continue
+
+                r = elem.get("r")
+                linha = int(r) if r else linha + 1
+                values = {}
+                for pos, c in enumerate(elem.iter(_T_C)):
+                    ref = c.get("r")
+                    j = _col_index(ref) if ref else pos
+                    t = c.get("t")
+                    if t == "inlineStr":
+                        is_node = c.find(_T_IS)
+                        value = "".join(n.text or "" for n in is_node.iter(_T_T)) if is_node is not None else ""
+                    else:
+                        v = c.find(_T_V)
+                        if v is None or v.text is None:
+                            continue
+                        text = v.text
+                        if t == "s":
+                            value = shared[int(text)]
+                        elif t == "b":
+                            value = text == "1"
+                        elif t in ("str", "e"):
+                            value = text if t == "str" else nan
+                        else:
+                            value = _to_number(text)
+                            if c.get("s") in date_styles:
+                                date_cols.add(j)
+                    values[j] = value
+
+                # linha sem valores (ex.: só formatação) não entra: o `r` da próxima preenchida
+                # já conta as linhas em branco, e as do fim da aba ficam de fora
+                if not values:
+                    pass
+                elif header is None:
+                    width = max(values) + 1
+                    header = [values.get(j, f"Unnamed: {j}") for j in range(width)]
+                    columns = [[] for _ in range(width)]
+                    ultima = linha
+                else:
+                    # linhas ausentes do XML (em branco) entre a anterior e esta
+                    n_rows += max(linha - ultima - 1, 0)
+                    for j, value in values.items():
+                        if j >= len(columns):
+                            # coluna fora do cabeçalho: cria preenchida com NaN
+                            for k in range(len(columns), j + 1):
+                                header.append(f"Unnamed: {k}")
+                                columns.append([])
+                        col = columns[j]
+                        if len(col) < n_rows:
+                            col.extend([nan] * (n_rows - len(col)))
+                        col.append(value)
+                    n_rows += 1
+                    ultima = linha
+
+                # libera a linha já processada (memória constante por linha)
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    elem.clear()
+
+        for col in columns:
+            if len(col) < n_rows:
+                col.extend([nan] * (n_rows - len(col)))
+
+    return header or [], columns, date_cols
+
+
+def _serial_to_datetime(values: list) -> pd.Series:
+    """Converte seriais do Excel em datetime (vetorizado quando a coluna é só numérica)."""
+    arr = pd.Series(values)
+    numeric = pd.to_numeric(arr, errors="coerce")
+    if numeric.notna().sum() == arr.notna().sum():
+        return (EXCEL_EPOCH + pd.to_timedelta(numeric, unit="D")).dt.round("ms")
+    # coluna mista: converte só os números, mantém o resto como veio
+    converted = EXCEL_EPOCH + pd.to_timedelta(numeric, unit="D")
+    return converted.dt.round("ms").astype(object).where(numeric.notna(), arr)
+
+
+def _infer_column(values: list) -> pd.Series:
+    """Inferência de tipos como a do pd.read_excel: texto numérico vira número."""
+    s = pd.Series(values)
+    if s.dtype == object:
+        try:
+            return pd.to_numeric(s)
+        except (ValueError, TypeError):
+            return s
+    return s
+
+
+def read_sheet(raw: bytes, sheet_name: str) -> pd.DataFrame:
+    """Lê a aba do XLSX em streaming e monta o DataFrame direto dos arrays de coluna."""
+    header, columns, date_cols = read_sheet_columns(raw, sheet_name)
+    data = {}
+    for j, col in enumerate(columns):
+        data[j] = _serial_to_datetime(col) if j in date_cols else _infer_column(col)
+    df = pd.DataFrame(data)
+    df.columns = header
+    return df
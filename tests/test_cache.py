@@ -0,0 +1,45 @@
+# tests/test_cache.py (Cache em disco: o DataFrame relido tem que ser igual ao gravado)
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from profarma import cache, datas
+
+
+@pytest.fixture(autouse=True)
+def _cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+
+
+def _round_trip(df: pd.DataFrame) -> pd.DataFrame:
+    assert cache.put("chave", df)
+    return cache.get("chave")
+
+
+def test_mixed_object_columns_round_trip():
+    df = pd.DataFrame({
+        "Matricula": pd.Series([123, "A45", np.nan, 7.5, True], dtype=object),
+        "Data": pd.Series(["05/01/2025", 45658, pd.Timestamp("2025-01-02 08:30"), "", np.nan], dtype=object),
+        "Nome": ["Ana", "Bia", np.nan, "Caio", "Duda"],
+        "Horas": [1.5, 2.0, np.nan, 0.0, 3.25],
+    })
+    relido = _round_trip(df)
+    pd.testing.assert_frame_equal(relido, df)
+    assert [type(v) for v in relido["Matricula"]] == [int, str, float, float, bool]
+
+    # a coluna Data mista vira as mesmas datas depois do cache
+    antes, invalidas_antes = datas.parse_dates(df["Data"])
+    depois, invalidas_depois = datas.parse_dates(relido["Data"])
+    pd.testing.assert_series_equal(depois, antes)
+    pd.testing.assert_series_equal(invalidas_depois, invalidas_antes)
+
+
+def test_unsupported_value_is_reported_not_cached(caplog):
+    df = pd.DataFrame({"Col": pd.Series([1, dt.time(8, 30)], dtype=object)})
+    with caplog.at_level("WARNING", logger=cache.__name__):
+        assert not cache.put("chave", df)
+    assert cache.get("chave") is None
+    assert "não gravado no cache" in caplog.text
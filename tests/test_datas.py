@@ -0,0 +1,62 @@
+# tests/test_datas.py (Coluna Data: caminho fixo por formato, sem inferência)
+
+import datetime as dt
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from profarma import datas, xlsx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_text_uses_day_first_format():
+    valores = pd.Series(["01/02/2025", "13/02/2025", " 28/02/2025 "], index=[5, 6, 7])
+    convertidas, invalidas = datas.parse_dates(valores)
+    assert convertidas.tolist() == [pd.Timestamp("2025-02-01"), pd.Timestamp("2025-02-13"),
+                                    pd.Timestamp("2025-02-28")]
+    assert convertidas.index.tolist() == [5, 6, 7]
+    assert not invalidas.any()
+
+
+def test_excel_serials_and_datetimes():
+    seriais, invalidas = datas.parse_dates(pd.Series([45658, 45658.5, np.nan]))
+    assert seriais.tolist()[:2] == [pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-01 12:00")]
+    assert pd.isna(seriais.iloc[2])
+    assert not invalidas.any()
+
+    ja_datas = pd.Series(pd.to_datetime(["2025-03-04", None]))
+    convertidas, invalidas = datas.parse_dates(ja_datas)
+    pd.testing.assert_series_equal(convertidas, ja_datas)
+    assert not invalidas.any()
+
+
+def test_mixed_column_goes_through_each_value_type():
+    valores = pd.Series(["05/01/2025", 45658, dt.datetime(2025, 1, 2), "", "2025-13-45", np.nan, "05/01/2025"],
+                        dtype=object)
+    convertidas, invalidas = datas.parse_dates(valores)
+    assert datas.detect_format(valores) == "misto"
+    assert convertidas.tolist()[:3] == [pd.Timestamp("2025-01-05"), pd.Timestamp("2025-01-01"),
+                                        pd.Timestamp("2025-01-02")]
+    assert convertidas.iloc[3:6].isna().all()
+    assert convertidas.iloc[6] == pd.Timestamp("2025-01-05")
+    # vazio e NaN não são inválidos; texto fora do formato é
+    assert invalidas.tolist() == [False, False, False, False, True, False, False]
+    assert (datas.filled(valores) & convertidas.isna()).tolist() == invalidas.tolist()
+
+
+@pytest.mark.parametrize("pasta", ["", "Dashboard"])
+def test_checked_in_report_has_no_invalid_dates(pasta):
+    caminho = os.path.join(RAIZ, pasta, "Relatorio_OcorrenciasNoPonto.xlsx")
+    if not os.path.exists(caminho):
+        pytest.skip("relatório de Ocorrências não está no checkout")
+    with open(caminho, "rb") as fh:
+        raw = fh.read()
+    df = xlsx.read_sheet(raw, xlsx.sheet_names(raw)[0])
+    convertidas, invalidas = datas.parse_dates(df["Data"])
+    assert not invalidas.any()
+    # mesmo resultado da conversão antiga (pd.to_datetime com dayfirst) nas células bem formadas
+    antigo = pd.to_datetime(df["Data"], errors="coerce", dayfirst=True)
+    pd.testing.assert_series_equal(convertidas, antigo, check_names=False)
@@ -0,0 +1,74 @@
+# tests/test_delta.py (Ingestão incremental: o resultado tem que bater com o processamento completo)
+
+import numpy as np
+import pandas as pd
+
+from profarma import cubo, dados, delta
+
+
+def _banco_horas(n: int = 40, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    minutos = rng.integers(-600, 600, size=(n, 3))
+    hhmm = lambda m: f"{'-' if m < 0 else ''}{abs(m) // 60:02d}:{abs(m) % 60:02d}"
+    return pd.DataFrame({
+        "Estabelecimento": [f"E{i % 3}" for i in range(n)],
+        "Departamento": [f"D{i % 5}" for i in range(n)],
+        "Matricula": np.arange(1000, 1000 + n),
+        "Referencia": "11/2025",
+        "SaldoFinal": [hhmm(m) for m in minutos[:, 0]],
+        "Pagamentos": [hhmm(m) for m in minutos[:, 1]],
+        "Descontos": [hhmm(m) for m in minutos[:, 2]],
+    })
+
+
+def _apply(inc: delta.Incremental, bruto: pd.DataFrame, conteudo: str) -> tuple:
+    return inc.apply(bruto.copy(), conteudo)
+
+
+def _check(derivado: pd.DataFrame, bruto: pd.DataFrame) -> None:
+    """Derivado alinhado ao bruto e igual ao processamento completo."""
+    esperado = dados.process_banco_horas(bruto.copy())
+    pd.testing.assert_frame_equal(derivado, esperado)
+
+
+def test_reorder_then_change_keeps_rows_aligned():
+    inc = delta.Incremental(delta.CHAVE_BANCO_HORAS, dados.process_banco_horas)
+    v1 = _banco_horas()
+    d1, _ = _apply(inc, v1, "v1")
+    _check(d1, v1)
+
+    # mesma exportação, linhas em outra ordem: nada a reprocessar, mas a ordem muda
+    v2 = v1.sample(frac=1, random_state=1).reset_index(drop=True)
+    d2, delta2 = _apply(inc, v2, "v2")
+    assert delta2.reprocessadas == 0 and len(delta2.removidas) == 0
+    _check(d2, v2)
+
+    # próxima versão altera uma linha: o reaproveitamento tem que usar as posições certas
+    v3 = v2.copy()
+    v3.loc[7, "SaldoFinal"] = "-99:59"
+    d3, delta3 = _apply(inc, v3, "v3")
+    assert list(delta3.alteradas) == [7] and len(delta3.inseridas) == 0
+    assert len(delta3.removidas) == 1
+    assert delta3.saidas["Matricula"].tolist() == [v3.loc[7, "Matricula"]]
+    _check(d3, v3)
+    assert not d3.duplicated(delta.CHAVE_BANCO_HORAS).any()
+
+
+def test_patched_cube_matches_full_build_after_reorder():
+    inc = delta.Incremental(delta.CHAVE_BANCO_HORAS, dados.process_banco_horas)
+    vazio = pd.DataFrame()
+    v1 = _banco_horas()
+    d1, _ = _apply(inc, v1, "v1")
+    cubo_atual = cubo.build_cube(vazio, d1)
+
+    v2 = v1.iloc[::-1].reset_index(drop=True)
+    v3 = v2.drop(index=[0, 5]).reset_index(drop=True)
+    v3.loc[3, "Departamento"] = "D9"
+    novas = _banco_horas(n=2, seed=5).assign(Matricula=[5000, 5001])
+    v3 = pd.concat([v3, novas], ignore_index=True)
+
+    for versao, bruto in (("v2", v2), ("v3", v3)):
+        derivado, d = _apply(inc, bruto, versao)
+        cubo_atual = cubo.patch_cube(cubo_atual, vazio, vazio, d.saidas, d.entradas)
+        pd.testing.assert_frame_equal(cubo_atual, cubo.build_cube(vazio, derivado))
+    _check(derivado, v3)
@@ -0,0 +1,54 @@
+# tests/test_fontes.py (Origens dos relatórios: interface e configuração resolvida só na carga)
+
+import os
+
+import pytest
+
+from profarma import cache, dados, fontes
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def _sem_fonte(tmp_path, monkeypatch):
+    """Fonte ainda não resolvida e cache isolado; o estado global volta ao final."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(dados, "_fonte", None)
+    dados.clear()
+    yield
+    dados.clear()
+
+
+def test_source_interface_requires_read():
+    with pytest.raises(TypeError):
+        fontes.Fonte()
+
+    class Parcial(fontes.Fonte):
+        pass
+
+    with pytest.raises(TypeError):
+        Parcial()
+
+
+def test_invalid_config_becomes_a_dataset_error(_sem_fonte, monkeypatch):
+    monkeypatch.setenv("PROFARMA_FONTE", "ftp")
+    ds = dados.build_dataset()
+    assert len(ds.erros) == 2
+    assert all("PROFARMA_FONTE inválida" in e for e in ds.erros)
+    assert dados.ARQUIVO_OCORRENCIAS in ds.erros[0]
+
+    monkeypatch.setenv("PROFARMA_FONTE", "pasta")
+    monkeypatch.delenv("PROFARMA_FONTE_ORIGEM", raising=False)
+    assert all("PROFARMA_FONTE_ORIGEM" in e for e in dados.build_dataset().erros)
+
+
+def test_local_folder_from_config(_sem_fonte, monkeypatch):
+    pasta = os.path.join(RAIZ, "Dashboard")
+    if not os.path.exists(os.path.join(pasta, dados.ARQUIVO_OCORRENCIAS)):
+        pytest.skip("relatórios não estão no checkout")
+    monkeypatch.setenv("PROFARMA_FONTE", "arquivo")
+    monkeypatch.setenv("PROFARMA_FONTE_ORIGEM", pasta)
+    ds = dados.build_dataset()
+    assert ds.erros == []
+    assert len(ds.ocorrencias) > 0 and len(ds.banco_horas) > 0
+    assert isinstance(dados.source(), fontes.ArquivoFonte)
@@ -0,0 +1,17 @@
+# tests/test_graficos.py (Rankings em graph_objects: mesma ordem visual do plotly.express)
+
+import pandas as pd
+import plotly.express as px
+
+from profarma import graficos
+
+
+def test_ranking_keeps_first_category_on_top_like_px():
+    df = pd.DataFrame({"Estabelecimento": ["a", "b", "c"], "Valor": [30, 20, 10]})
+    esperado = px.bar(df, x="Valor", y="Estabelecimento", orientation="h",
+                      category_orders={"Estabelecimento": df["Estabelecimento"].tolist()})
+    for fig in (graficos.ranking_bars(df["Estabelecimento"], df["Valor"], cor="red"),
+                graficos.ranking_bars(df["Estabelecimento"], df["Valor"], escala=["white", "red"])):
+        assert fig.layout.yaxis.categoryorder == esperado.layout.yaxis.categoryorder
+        assert tuple(fig.layout.yaxis.categoryarray) == tuple(esperado.layout.yaxis.categoryarray)
+        assert fig.layout.yaxis.autorange == esperado.layout.yaxis.autorange
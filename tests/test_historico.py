@@ -0,0 +1,91 @@
+# tests/test_historico.py (Histórico: reingerir exportações não pode apagar períodos vizinhos)
+
+import os
+
+import pandas as pd
+import pytest
+
+from profarma import historico
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _ocorrencias(inicio: str, fim: str, por_dia: int = 2) -> pd.DataFrame:
+    """Exportação sintética de Ocorrências, `por_dia` linhas em cada dia de inicio a fim."""
+    dias = pd.date_range(inicio, fim, freq="D").repeat(por_dia)
+    return pd.DataFrame({
+        "Matricula": [1000 + i % por_dia for i in range(len(dias))],
+        "Nome": [f"Pessoa {i % por_dia}" for i in range(len(dias))],
+        "Data": dias.strftime("%d/%m/%Y"),
+        "Ocorrencia": "Falta",
+    })
+
+
+def _dias(df: pd.DataFrame) -> pd.Series:
+    return pd.to_datetime(df["Data"], format="%d/%m/%Y")
+
+
+def test_consecutive_pay_period_exports_both_survive(tmp_path):
+    base = str(tmp_path)
+    julho = _ocorrencias("2026-06-11", "2026-07-10")
+    agosto = _ocorrencias("2026-07-11", "2026-08-10")
+    historico.ingest(julho, base=base)
+    historico.ingest(agosto, base=base)
+
+    gravado = historico.read(historico.OCORRENCIAS, base=base)
+    assert len(gravado) == len(julho) + len(agosto)
+    assert historico.partitions(historico.OCORRENCIAS, base) == ["2026-06", "2026-07", "2026-08"]
+    # 2026-07 guarda os dias 1-10 da primeira exportação e 11-31 da segunda
+    assert len(historico.read(historico.OCORRENCIAS, "2026-07", "2026-07", base)) == 31 * 2
+
+    # reingerir a mesma exportação substitui, sem duplicar
+    historico.ingest(agosto, base=base)
+    assert len(historico.read(historico.OCORRENCIAS, base=base)) == len(julho) + len(agosto)
+
+
+def test_edge_day_without_rows_needs_a_known_period(tmp_path):
+    base = str(tmp_path)
+    historico.ingest(_ocorrencias("2026-07-11", "2026-08-10"), base=base)
+    # reexportação em que o dia 10/08 deixou de ter ocorrências
+    reexportado = _ocorrencias("2026-07-11", "2026-08-09")
+
+    historico.ingest(reexportado, base=base)
+    assert (_dias(historico.read(historico.OCORRENCIAS, base=base)) == "2026-08-10").sum() == 2
+
+    historico.ingest(reexportado, base=base, periodo=(pd.Timestamp("2026-07-11"), pd.Timestamp("2026-08-10")))
+    assert (_dias(historico.read(historico.OCORRENCIAS, base=base)) == "2026-08-10").sum() == 0
+
+
+def test_stored_bank_hours_period_bounds_the_export(tmp_path):
+    base = str(tmp_path)
+    bh = pd.DataFrame({
+        "Matricula": [1000, 1001],
+        "Referencia": "08/2026",
+        "PeriodoInicial": pd.Timestamp("2026-07-11"),
+        "PeriodoFinal": pd.Timestamp("2026-08-10"),
+        "SaldoFinal": ["01:00", "-00:30"],
+    })
+    historico.ingest(bh, base=base)
+    assert historico.bh_periods(base) == [(pd.Timestamp("2026-07-11"), pd.Timestamp("2026-08-10"))]
+
+    historico.ingest(_ocorrencias("2026-06-11", "2026-07-10"), base=base)
+    historico.ingest(_ocorrencias("2026-07-11", "2026-08-10"), base=base)
+    historico.ingest(_ocorrencias("2026-07-11", "2026-08-09"), base=base)
+
+    dias = _dias(historico.read(historico.OCORRENCIAS, base=base))
+    assert (dias == "2026-08-10").sum() == 0      # dentro do período do BH: substituído
+    assert (dias <= "2026-07-10").sum() == 30 * 2  # exportação anterior intacta
+
+
+def test_real_export_after_the_previous_month(tmp_path):
+    caminho = os.path.join(RAIZ, "Relatorio_OcorrenciasNoPonto.xlsx")
+    if not os.path.exists(caminho):
+        pytest.skip("relatório de Ocorrências não está no checkout")
+    base = str(tmp_path)
+    _, atual, _ = historico.read_file(caminho)
+    anterior = atual.copy()
+    anterior["Data"] = pd.to_datetime(anterior["Data"]) - pd.DateOffset(months=1)
+
+    historico.ingest(anterior, base=base)
+    historico.ingest(atual, base=base)
+    assert len(historico.read(historico.OCORRENCIAS, base=base)) == len(anterior) + len(atual)
@@ -0,0 +1,65 @@
+# tests/test_horas.py (Conversão vetorizada de durações: mesmo resultado da conversão célula a célula)
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from profarma import horas, xlsx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _hhmm_to_min(time_str):
+    """Conversão antiga, célula a célula (referência)."""
+    if pd.isna(time_str):
+        return 0
+    s = str(time_str).strip()
+    if s in ("", "00:00", "00:00:00"):
+        return 0
+    neg = s.startswith("-")
+    if neg:
+        s = s[1:]
+    parts = s.split(":")
+    try:
+        h, m = int(parts[0]), int(parts[1])
+    except Exception:
+        return 0
+    total = h * 60 + m
+    return -total if neg else total
+
+
+def test_matches_cell_by_cell_conversion():
+    valores = pd.Series(
+        ["08:30", "-01:15", "00:00", "00:00:00", "-00:45", "125:07", "12:30:59", " 02:05 ",
+         "- 03:10", "", "  ", "abc", "7", "1:2:3", "10:xx", np.nan, None, 0, 5.0],
+        dtype=object,
+    )
+    esperado = valores.map(_hhmm_to_min).astype(np.int64)
+    pd.testing.assert_series_equal(horas.hhmm_series_to_min(valores), esperado)
+
+
+def test_keeps_index_and_handles_empty_input():
+    valores = pd.Series(["01:00", "-00:30"], index=[10, 20])
+    assert horas.hhmm_series_to_min(valores).to_dict() == {10: 60, 20: -30}
+    assert horas.hhmm_series_to_min(pd.Series([], dtype=object)).dtype == np.int64
+    assert horas.hhmm_series_to_min(pd.Series([np.nan, np.nan])).tolist() == [0, 0]
+
+
+@pytest.mark.parametrize("pasta", ["", "Dashboard"])
+def test_matches_cell_by_cell_on_checked_in_report(pasta):
+    caminho = os.path.join(RAIZ, pasta, "Relatorio_ContaCorrenteBancoDeHorasResumo.xlsx")
+    if not os.path.exists(caminho):
+        pytest.skip("relatório de Banco de Horas não está no checkout")
+    with open(caminho, "rb") as fh:
+        raw = fh.read()
+    df = xlsx.read_sheet(raw, xlsx.sheet_names(raw)[0])
+    for col in ["SaldoFinal", "Pagamentos", "Descontos"]:
+        esperado = df[col].map(_hhmm_to_min).astype(np.int64)
+        pd.testing.assert_series_equal(horas.hhmm_series_to_min(df[col]), esperado, check_names=False)
+
+
+def test_minutes_round_trip_through_hhmm():
+    minutos = pd.Series([0, 1, 59, 60, -61, 6000, -1439], dtype=np.int64)
+    assert horas.hhmm_series_to_min(horas.min_series_to_hhmm(minutos)).tolist() == minutos.tolist()
@@ -0,0 +1,53 @@
+# tests/test_xlsx.py (Leitor em streaming: tem que devolver o mesmo DataFrame que o pd.read_excel)
+
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from profarma import xlsx
+
+openpyxl = pytest.importorskip("openpyxl")
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLANILHAS = [
+    "Relatorio_OcorrenciasNoPonto.xlsx",
+    "Relatorio_ContaCorrenteBancoDeHorasResumo.xlsx",
+    os.path.join("Dashboard", "Relatorio_OcorrenciasNoPonto.xlsx"),
+    os.path.join("Dashboard", "Relatorio_ContaCorrenteBancoDeHorasResumo.xlsx"),
+]
+
+
+def _compare(raw: bytes, aba: str) -> None:
+    esperado = pd.read_excel(io.BytesIO(raw), sheet_name=aba)
+    pd.testing.assert_frame_equal(xlsx.read_sheet(raw, aba), esperado)
+
+
+@pytest.mark.parametrize("nome", PLANILHAS)
+def test_matches_read_excel_on_checked_in_reports(nome):
+    caminho = os.path.join(RAIZ, nome)
+    if not os.path.exists(caminho):
+        pytest.skip(f"{nome} não está no checkout")
+    with open(caminho, "rb") as fh:
+        raw = fh.read()
+    for aba in xlsx.sheet_names(raw):
+        _compare(raw, aba)
+
+
+def test_blank_rows_inside_the_sheet_are_kept():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Aba"
+    ws["A1"], ws["B1"] = "Matricula", "Nome"
+    ws["A2"], ws["B2"] = 1, "Ana"
+    # linhas 3 e 4 não existem no XML; a 5 só tem a coluna B
+    ws["B5"] = "Bia"
+    ws["A6"] = 3
+    # linha só com formatação no fim da aba: o pd.read_excel descarta
+    ws["A8"].number_format = "0"
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    _compare(buf.getvalue(), "Aba")
+    assert len(xlsx.read_sheet(buf.getvalue(), "Aba")) == 5